@@ -0,0 +1,20 @@
+from django.urls import include, path, re_path
+
+from recipes import async_views
+
+urlpatterns = [
+    path('api/recipes/', async_views.recipe_list),
+    re_path(r'^api/recipes/(?P<pk>\d+)/$', async_views.recipe_detail),
+    path('api/tags/', async_views.tag_list),
+    re_path(r'^api/tags/(?P<pk>\d+)/$', async_views.tag_detail),
+    path('api/ingredients/', async_views.ingredient_list),
+    re_path(
+        r'^api/ingredients/(?P<pk>\d+)/$', async_views.ingredient_detail
+    ),
+    path(
+        's/<str:slug>/',
+        async_views.redirect_from_short_link,
+        name='redirect'
+    ),
+    path('', include('foodgram.urls')),
+]
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recipes.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -34,10 +35,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'recipes.middleware.CatalogVersionMiddleware',
+    'recipes.middleware.ASGIURLConfMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
 
+ASGI_URLCONF = 'foodgram.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -99,7 +104,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'recipes.pagination.RecipePagination',
     'PAGE_SIZE': 6,
@@ -124,10 +129,52 @@ DJOSER = {
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+RECIPE_THUMBNAIL_SIZE = (480, 480)
+AVATAR_THUMBNAIL_SIZE = (96, 96)
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 80
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'collected_static'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = 300
+
+SHORT_LINK_CACHE_SIZE = 4096
+
+CATALOG_TTL = 300
+
+TOKEN_CACHE_TIMEOUT = 300
+
+FEED_PULL_RECIPES_COUNT = 500
+FEED_PULL_SUBSCRIBERS_COUNT = 10000
+FEED_PUSH_RECIPES_COUNT = 400
+FEED_PUSH_SUBSCRIBERS_COUNT = 8000
+FEED_BATCH_SIZE = 1000
+
+SIMILAR_RECIPES_COUNT = 10
+
+PANTRY_MAX_MISSING_SHARE = 0.5
+PANTRY_MATCH_LIMIT = 1000
+
+TRENDING_WINDOWS = {'1d': 1, '7d': 7, '30d': 30}
+TRENDING_DEFAULT_WINDOW = '7d'
+RANKING_FAVOURITE_WEIGHT = 2
+RANKING_CART_WEIGHT = 1
+RANKING_SIZE = 10000
+RANKING_REFRESH_INTERVAL = 600
+
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
@@ -146,3 +193,7 @@ LOGGING = {
 }
 
 CSV_FILES_DIR = os.path.join(BASE_DIR, 'data')
+
+INGREDIENT_INDEX_PATH = os.getenv(
+    'INGREDIENT_INDEX_PATH', os.path.join(CSV_FILES_DIR, 'ingredients.idx')
+)
@@ -3,7 +3,7 @@ from django.urls import include, path
 from rest_framework import routers
 
 from recipes.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
-                           redirect_from_short_link)
+                           export_metrics, redirect_from_short_link)
 from users.views import UserViewSet, subscribe
 
 router = routers.DefaultRouter()
@@ -18,6 +18,7 @@ urlpatterns = [
     path('api/auth/', include('djoser.urls.authtoken')),
     path('api/users/<int:pk>/subscribe/', subscribe, name='subscribe'),
     path('s/<str:slug>/', redirect_from_short_link, name='redirect'),
+    path('metrics', export_metrics, name='metrics'),
     path('api/', include(router.urls)),
     path('api/', include('djoser.urls')),
 ]
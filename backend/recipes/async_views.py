@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import (HttpResponse, HttpResponseNotAllowed,
+                         HttpResponseRedirect)
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+
+from recipes.catalog import get_catalog, loaded_catalog
+from recipes.conditional import conditional_response, make_etag
+from recipes.utils import resolve_short_link, short_links
+from recipes.views import RecipeViewSet
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def in_db_thread(func):
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def rendered(view):
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    return render
+
+
+def offloaded(view):
+    pooled = in_db_thread(rendered(view))
+    shared = sync_to_async(rendered(view))
+
+    async def handle(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await pooled(request, *args, **kwargs)
+        return await shared(request, *args, **kwargs)
+    handle.csrf_exempt = True
+    return handle
+
+
+recipe_list = offloaded(RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}
+))
+recipe_detail = offloaded(RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}))
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status
+    )
+
+
+def not_found():
+    return json_response({'detail': NotFound.default_detail}, status=404)
+
+
+async def serve_catalog(request, build_response):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET'])
+    catalog = loaded_catalog() or await in_db_thread(get_catalog)()
+    return conditional_response(
+        request,
+        lambda: build_response(catalog),
+        make_etag(catalog.etag, request.get_full_path())
+    )
+
+
+def catalog_item(lookup, pk):
+    item = lookup(int(pk))
+    if item is None:
+        return not_found()
+    return json_response(item)
+
+
+async def tag_list(request):
+    return await serve_catalog(
+        request, lambda catalog: json_response(catalog.tag_list)
+    )
+
+
+async def tag_detail(request, pk):
+    return await serve_catalog(
+        request, lambda catalog: catalog_item(catalog.tag, pk)
+    )
+
+
+async def ingredient_list(request):
+    return await serve_catalog(
+        request,
+        lambda catalog: json_response(catalog.ingredient_index.search(
+            request.GET.get('name', '')
+        ))
+    )
+
+
+async def ingredient_detail(request, pk):
+    return await serve_catalog(
+        request, lambda catalog: catalog_item(catalog.ingredient, pk)
+    )
+
+
+async def redirect_from_short_link(request, slug):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET'])
+    long_link = short_links.get(slug)
+    if long_link is None:
+        long_link = await in_db_thread(resolve_short_link)(slug)
+    if long_link is None:
+        return not_found()
+    return HttpResponseRedirect(long_link)
@@ -0,0 +1,21 @@
+import statistics
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+def summarize(latencies, elapsed, errors=0):
+    p50, p95, p99 = percentiles(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(p50 * 1000, 2),
+        'p95_ms': round(p95 * 1000, 2),
+        'p99_ms': round(p99 * 1000, 2),
+    }
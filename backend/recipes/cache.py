@@ -0,0 +1,96 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+from rest_framework.response import Response
+
+LIST_VERSION_KEY = 'recipes:list:version'
+HITS_KEY = 'recipes:cache:hits'
+MISSES_KEY = 'recipes:cache:misses'
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def incr_counter(key, alias=DEFAULT_CACHE_ALIAS):
+    counters = caches[alias]
+    counters.add(key, 0, timeout=None)
+    try:
+        counters.incr(key)
+    except ValueError:
+        counters.set(key, 1, timeout=None)
+
+
+def _incr(key):
+    incr_counter(key, settings.RECIPE_CACHE_ALIAS)
+
+
+def _normalized_params(request):
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    )
+    return f'{request.get_host()}?{params}'
+
+
+def _hashed(prefix, raw):
+    return f'{prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def list_version():
+    return get_cache().get_or_set(LIST_VERSION_KEY, 1, timeout=None)
+
+
+def list_cache_key(request, *stamps):
+    return _hashed(
+        f'recipes:list:{list_version()}',
+        '|'.join((_normalized_params(request), *map(str, stamps)))
+    )
+
+
+def detail_cache_key(request, pk):
+    return _hashed(f'recipes:detail:{pk}', _normalized_params(request))
+
+
+def detail_index_key(pk):
+    return f'recipes:detail:{pk}:keys'
+
+
+def cached_response(key, build_response, pk=None):
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        _incr(HITS_KEY)
+        return Response(data)
+    _incr(MISSES_KEY)
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        if pk is not None:
+            index_key = detail_index_key(pk)
+            keys = cache.get(index_key, set())
+            keys.add(key)
+            cache.set(index_key, keys, settings.RECIPE_CACHE_TIMEOUT)
+    return response
+
+
+def _invalidate(recipe_ids):
+    cache = get_cache()
+    _incr(LIST_VERSION_KEY)
+    for pk in recipe_ids:
+        index_key = detail_index_key(pk)
+        cache.delete_many(list(cache.get(index_key, ())) + [index_key])
+
+
+def invalidate_recipes(*recipe_ids):
+    transaction.on_commit(lambda: _invalidate(recipe_ids))
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,87 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.cache import incr_counter
+from recipes.ingredient_index import load_ingredient_index
+from recipes.models import Tag
+
+VERSION_KEY = 'catalog:version'
+
+_state = {'catalog': None}
+
+
+class Catalog:
+
+    def __init__(self, version, tags, ingredient_index):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.tag_list = [
+            {'id': tag['id'], 'name': tag['name'], 'slug': tag['slug']}
+            for tag in tags
+        ]
+        self.tags = {tag['id']: tag for tag in self.tag_list}
+        self.tag_bits = {tag['id']: tag['bit'] for tag in tags}
+        self.tag_slug_bits = {tag['slug']: tag['bit'] for tag in tags}
+        self.ingredient_index = ingredient_index
+        self.ingredient_positions = {
+            pk: position for position, pk in enumerate(ingredient_index.ids)
+        }
+        digest = hashlib.md5(ingredient_index.buffer)
+        digest.update(repr(tags).encode())
+        self.etag = digest.hexdigest()
+
+    @classmethod
+    def load(cls, version, use_file=False):
+        return cls(
+            version,
+            list(Tag.objects.order_by('id').values(
+                'id', 'name', 'slug', 'bit'
+            )),
+            load_ingredient_index(use_file=use_file)
+        )
+
+    def is_stale(self, version):
+        return (
+            self.version != version
+            or time.monotonic() - self.loaded_at > settings.CATALOG_TTL
+        )
+
+    def tag(self, pk):
+        return self.tags.get(pk)
+
+    def ingredient(self, pk):
+        position = self.ingredient_positions.get(pk)
+        if position is None:
+            return None
+        return self.ingredient_index.row(position)
+
+    def has_tags(self, ids):
+        return all(pk in self.tags for pk in ids)
+
+    def has_ingredients(self, ids):
+        return all(pk in self.ingredient_positions for pk in ids)
+
+
+def refresh_catalog():
+    version = cache.get(VERSION_KEY, 0)
+    catalog = _state['catalog']
+    if catalog is None or catalog.is_stale(version):
+        catalog = _state['catalog'] = Catalog.load(
+            version, use_file=catalog is None and not version
+        )
+    return catalog
+
+
+def loaded_catalog():
+    return _state['catalog']
+
+
+def get_catalog():
+    return loaded_catalog() or refresh_catalog()
+
+
+def invalidate_catalog():
+    incr_counter(VERSION_KEY)
@@ -0,0 +1,43 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from recipes.cache import incr_counter
+
+
+def user_state_key(user_id):
+    return f'user:{user_id}:state'
+
+
+def user_state_version(user):
+    if not user.is_authenticated:
+        return 0
+    return cache.get(user_state_key(user.id), 0)
+
+
+def bump_user_state(user_id):
+    incr_counter(user_state_key(user_id))
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def conditional_response(request, build_response, etag,
+                         last_modified=None):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = build_response()
+        if response.status_code != 200:
+            return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    patch_vary_headers(response, ('Authorization',))
+    return response
@@ -5,4 +5,7 @@ MAX_LENGTH_INGREDIENT = 128
 MAX_LENGTH_MEAS_UNIT = 64
 MAX_LENGTH_SHORT_LINK = 128
 MAX_LENGTH_LONG_LINK = 256
+MAX_LENGTH_RANKING_WINDOW = 8
 BOOL_CHOICES = ((0, 'False'), (1, 'True'))
+MAX_TAGS = 63
+MAX_BULK_RECIPES = 100
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    (('recipes', 'Recipe'), 'favourite_count',
+     ('recipes', 'UserFavourite'), 'recipe'),
+    (('users', 'User'), 'recipes_count',
+     ('recipes', 'Recipe'), 'author'),
+    (('users', 'User'), 'subscribers_count',
+     ('users', 'Subscription'), 'subscription'),
+)
+
+
+def _actual_count(apps, related_model, related_field):
+    related = apps.get_model(*related_model)
+    return Coalesce(
+        Subquery(
+            related.objects.filter(**{related_field: OuterRef('pk')})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def find_drift(apps):
+    drift = {}
+    for model, field, related_model, related_field in COUNTERS:
+        drift[f'{model[1]}.{field}'] = apps.get_model(*model).objects.annotate(
+            actual=_actual_count(apps, related_model, related_field)
+        ).exclude(**{field: F('actual')}).count()
+    return drift
+
+
+@transaction.atomic
+def rebuild_counters(apps):
+    for model, field, related_model, related_field in COUNTERS:
+        apps.get_model(*model).objects.update(
+            **{field: _actual_count(apps, related_model, related_field)}
+        )
@@ -1,6 +1,26 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FilteredRelation, Q
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.catalog import get_catalog
+from recipes.models import Ingredient, Recipe, tags_mask
+from recipes.pantry import get_pantry
+from recipes.rankings import WINDOW_ALL
+
+
+ORDERING_CHOICES = (
+    ('popular', 'Популярные'),
+)
+
+
+def tag_choices():
+    return [(tag['slug'], tag['name']) for tag in get_catalog().tag_list]
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
 
 
 class IngredientSearchFilter(FilterSet):
@@ -12,18 +32,27 @@ class IngredientSearchFilter(FilterSet):
 
     def filter_name(self, queryset, name, value):
         return queryset.filter(
-            name__istartswith=value
+            id__in=get_catalog().ingredient_index.search_ids(value)
         )
 
 
 class RecipeFilter(FilterSet):
 
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags',
+    )
+    tags_all = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags_all',
     )
 
+    search = filters.CharFilter(method='filter_search')
+    have = NumberInFilter(method='filter_have')
+    ordering = filters.ChoiceFilter(
+        choices=ORDERING_CHOICES,
+        method='filter_ordering',
+    )
     is_favorited = filters.BooleanFilter(method='is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart'
@@ -33,16 +62,63 @@ class RecipeFilter(FilterSet):
         model = Recipe
         fields = ('tags', 'author')
 
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.alias(
+            matched_tags=F('tags_mask').bitand(tags_mask(
+                get_catalog().tag_slug_bits[slug] for slug in value
+            ))
+        ).exclude(matched_tags=0)
+
+    def filter_tags_all(self, queryset, name, value):
+        if not value:
+            return queryset
+        mask = tags_mask(
+            get_catalog().tag_slug_bits[slug] for slug in value
+        )
+        return queryset.alias(
+            matched_tags=F('tags_mask').bitand(mask)
+        ).filter(matched_tags=mask)
+
+    def filter_search(self, queryset, name, value):
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            )
+        query = SearchQuery(value, config='russian', search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date')
+
+    def filter_have(self, queryset, name, value):
+        if not value:
+            return queryset
+        recipe_ids = get_pantry().match(
+            [int(pk) for pk in value],
+            settings.PANTRY_MAX_MISSING_SHARE,
+            settings.PANTRY_MATCH_LIMIT
+        )
+        if not recipe_ids:
+            return queryset.none()
+        self.request.pantry_ranking = recipe_ids
+        return queryset.filter(id__in=recipe_ids)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.annotate(popular=FilteredRelation(
+            'rankings', condition=Q(rankings__window=WINDOW_ALL)
+        )).order_by(
+            F('popular__position').asc(nulls_last=True), '-pub_date', '-id'
+        )
+
     def is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
-            return queryset.filter(userfavorites__user=user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
-            queryset = queryset.filter(
-                usershoppingcart__user=self.request.user
-            )
-        return queryset.distinct()
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
@@ -0,0 +1,149 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from recipes.models import Ingredient
+
+MAGIC = b'IGX1'
+HEADER = struct.Struct('<4sIII')
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+
+    def __init__(self, buffer):
+        magic, size, keys_length, payload_length = HEADER.unpack_from(
+            buffer
+        )
+        if magic != MAGIC:
+            raise ValueError('Неверный формат индекса ингредиентов.')
+        self.buffer = buffer
+        self.size = size
+        view = memoryview(buffer)
+        start = HEADER.size
+        end = start + (size + 1) * 4
+        self.key_offsets = view[start:end].cast('I')
+        start, end = end, end + (size + 1) * 4
+        self.payload_offsets = view[start:end].cast('I')
+        start, end = end, end + size * 8
+        self.ids = view[start:end].cast('q')
+        self.keys_start, self.keys_end = end, end + keys_length
+        self.keys = view[self.keys_start:self.keys_end]
+        self.payload = view[self.keys_end:self.keys_end + payload_length]
+
+    @staticmethod
+    def pack(rows):
+        rows = sorted(
+            (normalize(name).encode(), pk, f'{name}\t{unit}'.encode())
+            for pk, name, unit in rows
+        )
+        key_offsets, payload_offsets = array('I', [0]), array('I', [0])
+        for key, pk, payload in rows:
+            key_offsets.append(key_offsets[-1] + len(key) + 1)
+            payload_offsets.append(payload_offsets[-1] + len(payload))
+        keys = b''.join(key + b'\n' for key, pk, payload in rows)
+        payload = b''.join(payload for key, pk, payload in rows)
+        return b''.join((
+            HEADER.pack(MAGIC, len(rows), len(keys), len(payload)),
+            key_offsets.tobytes(),
+            payload_offsets.tobytes(),
+            array('q', (pk for key, pk, payload in rows)).tobytes(),
+            keys,
+            payload,
+        ))
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(cls.pack(rows))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as index_file:
+            return cls(mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ
+            ))
+
+    @classmethod
+    def dump(cls, rows, path):
+        with open(path, 'wb') as index_file:
+            index_file.write(cls.pack(rows))
+
+    def key(self, position):
+        return bytes(self.keys[
+            self.key_offsets[position]:self.key_offsets[position + 1] - 1
+        ])
+
+    def row(self, position):
+        name, unit = bytes(self.payload[
+            self.payload_offsets[position]:
+            self.payload_offsets[position + 1]
+        ]).decode().split('\t')
+        return {
+            'id': self.ids[position],
+            'name': name,
+            'measurement_unit': unit,
+        }
+
+    def _lower_bound(self, prefix):
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def positions(self, value):
+        needle = normalize(value).encode()
+        if not needle:
+            return list(range(self.size))
+        prefix_matches = []
+        position = self._lower_bound(needle)
+        while position < self.size and self.key(position).startswith(
+            needle
+        ):
+            prefix_matches.append(position)
+            position += 1
+        prefixed = set(prefix_matches)
+        substring_matches = []
+        found = self.buffer.find(needle, self.keys_start, self.keys_end)
+        while found != -1:
+            position = bisect_right(
+                self.key_offsets, found - self.keys_start
+            ) - 1
+            if position not in prefixed:
+                substring_matches.append(position)
+            found = self.buffer.find(
+                needle,
+                self.keys_start + self.key_offsets[position + 1],
+                self.keys_end
+            )
+        return prefix_matches + substring_matches
+
+    def search(self, value):
+        return [self.row(position) for position in self.positions(value)]
+
+    def search_ids(self, value):
+        return [self.ids[position] for position in self.positions(value)]
+
+
+def load_ingredient_index(use_file=True):
+    path = settings.INGREDIENT_INDEX_PATH
+    if use_file and path and os.path.exists(path):
+        index = IngredientIndex.load(path)
+        stamp = Ingredient.objects.aggregate(total=Count('id'), last=Max('id'))
+        if (index.size == stamp['total']
+                and max(index.ids, default=None) == stamp['last']):
+            return index
+    return IngredientIndex.from_rows(
+        Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+    )
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.benchmark import summarize
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/tags/',
+    '/api/ingredients/?name=мол',
+    '/s/1/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки WSGI и ASGI '
+        'развёртываний под параллельной нагрузкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            default=[],
+            help='Сервер в виде имя=адрес, например wsgi=http://web:8000.'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            help='Адрес для нагрузки, можно указать несколько раз.'
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--token', help='Токен для авторизации.')
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести результат в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        targets = [target.split('=', 1) for target in options['target']]
+        if not targets or any(len(target) != 2 for target in targets):
+            raise CommandError('Укажите серверы: --target имя=адрес.')
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        results = {}
+        for name, base_url in targets:
+            for path in options['path'] or DEFAULT_PATHS:
+                results.setdefault(name, {})[path] = self.run(
+                    base_url.rstrip('/') + path, headers, options
+                )
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False))
+            return
+        for name, paths in results.items():
+            for path, stats in paths.items():
+                self.stdout.write(
+                    f'{name:<8} {path:<36} '
+                    f'{stats["throughput"]:>8} з/с  '
+                    f'p50 {stats["p50_ms"]} мс  '
+                    f'p95 {stats["p95_ms"]} мс  '
+                    f'p99 {stats["p99_ms"]} мс  '
+                    f'ошибок {stats["errors"]}'
+                )
+
+    def run(self, url, headers, options):
+        sessions = threading.local()
+
+        def fetch(_):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+                sessions.session.headers.update(headers)
+            started = time.perf_counter()
+            try:
+                response = sessions.session.get(url, allow_redirects=False)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            return time.perf_counter() - started, failed
+
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(fetch, range(options['warmup'])))
+            started = time.perf_counter()
+            samples = list(executor.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        return summarize(
+            [latency for latency, failed in samples],
+            elapsed,
+            errors=sum(failed for latency, failed in samples)
+        )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.ingredient_index import IngredientIndex
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = 'Собирает файл префиксного индекса ингредиентов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.INGREDIENT_INDEX_PATH,
+            help='Куда записать индекс.'
+        )
+
+    def handle(self, *args, **options):
+        rows = Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        )
+        IngredientIndex.dump(rows, options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс из {len(rows)} ингредиентов записан в {options["path"]}.'
+        ))
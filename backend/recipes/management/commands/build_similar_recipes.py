@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from recipes.models import Recipe, SimilarRecipe
+from recipes.similarity import (affected_positions, ingredient_matrix,
+                                top_neighbours)
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает похожие рецепты по пересечению ингредиентов '
+        '(коэффициент Жаккара) и сохраняет top-k соседей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рецепты, а не только изменённые.'
+        )
+        parser.add_argument(
+            '--k', type=int, default=settings.SIMILAR_RECIPES_COUNT
+        )
+        parser.add_argument('--batch-size', type=int, default=512)
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        timer = time.monotonic()
+        k = options['k']
+        watermark = SimilarRecipe.objects.aggregate(
+            Max('computed_at')
+        )['computed_at__max']
+        recipe_ids, matrix = ingredient_matrix()
+        if options['full'] or watermark is None:
+            SimilarRecipe.objects.all().delete()
+            positions = np.arange(len(recipe_ids))
+        else:
+            positions = self.dirty_positions(recipe_ids, matrix, watermark, k)
+        rows = 0
+        batch = []
+        for recipe_id, similar_ids, scores in top_neighbours(
+            recipe_ids, matrix, positions, k, options['batch_size']
+        ):
+            batch.append((recipe_id, similar_ids, scores))
+            if len(batch) >= options['batch_size']:
+                rows += self.save(batch, started)
+                batch = []
+        rows += self.save(batch, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов {len(positions)} из {len(recipe_ids)}, '
+            f'сохранено пар {rows} за {time.monotonic() - timer:.1f} с.'
+        ))
+
+    def dirty_positions(self, recipe_ids, matrix, watermark, k):
+        changed = np.array(Recipe.objects.filter(
+            updated_at__gt=watermark
+        ).values_list('id', flat=True), dtype=np.int64)
+        thresholds = {
+            row['recipe_id']: (row['score__min'], row['id__count'])
+            for row in SimilarRecipe.objects.values('recipe_id').annotate(
+                Min('score'), Count('id')
+            )
+        }
+        stale = np.array(SimilarRecipe.objects.filter(
+            similar_id__in=changed.tolist()
+        ).values_list('recipe_id', flat=True).distinct(), dtype=np.int64)
+        return np.union1d(
+            affected_positions(recipe_ids, matrix, changed, thresholds, k),
+            np.flatnonzero(np.isin(recipe_ids, stale))
+        ).astype(np.int64)
+
+    @transaction.atomic
+    def save(self, batch, computed_at):
+        if not batch:
+            return 0
+        SimilarRecipe.objects.filter(
+            recipe_id__in=[int(recipe_id) for recipe_id, *rest in batch]
+        ).delete()
+        created = SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(
+                recipe_id=int(recipe_id),
+                similar_id=similar_id,
+                score=score,
+                computed_at=computed_at
+            )
+            for recipe_id, similar_ids, scores in batch
+            for similar_id, score in zip(similar_ids, scores)
+        )
+        return len(created)
@@ -0,0 +1,242 @@
+import io
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.cache import invalidate_recipes
+from recipes.catalog import invalidate_catalog
+from recipes.counters import rebuild_counters
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
+                            TagRecipe, User, UserFavourite, UserShoppingCart,
+                            tags_mask)
+from recipes.pantry import invalidate_pantry
+from recipes.shopping_list import rebuild_shopping_lists
+from recipes.timeline import rebuild_timelines
+from users.models import Subscription
+
+IMAGE_NAME = 'recipes/images/synthetic.png'
+PASSWORD = 'synthetic-password'
+TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+    ('Выпечка', 'bakery'),
+    ('Суп', 'soup'),
+    ('Салат', 'salad'),
+    ('Вегетарианское', 'vegetarian'),
+)
+DISHES = (
+    'Суп', 'Салат', 'Пирог', 'Рагу', 'Запеканка', 'Омлет', 'Паста',
+    'Каша', 'Котлеты', 'Блины',
+)
+
+
+def skewed_sampler(population, skew):
+    population = list(population)
+    cum_weights = list(accumulate(
+        1 / (rank + 1) ** skew for rank in range(len(population))
+    ))
+
+    def sample(rng, size):
+        size = min(size, len(population))
+        picked = set()
+        while len(picked) < size:
+            picked.update(rng.choices(
+                population, cum_weights=cum_weights, k=size - len(picked)
+            ))
+        return picked
+    return sample
+
+
+def placeholder_image():
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (230, 180, 120)).save(buffer, 'PNG')
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, рецепты, избранное, '
+        'списки покупок и подписки для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--recipes-per-user', type=float, default=5,
+            help='Среднее число рецептов у пользователя.'
+        )
+        parser.add_argument('--favourites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='За сколько дней распределить даты публикации.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Насколько популярность рецептов и авторов неравномерна.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов, сначала выполните load_data.'
+            )
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        with transaction.atomic():
+            tags = self.ensure_tags()
+            user_ids = self.create_users(options['users'])
+            recipes = self.create_recipes(
+                user_ids, ingredient_ids, tags, options
+            )
+            recipe_ids = [pk for pk, author_id in recipes]
+            self.rng.shuffle(recipe_ids)
+            favourites = self.create_links(
+                UserFavourite, 'recipe_id', user_ids, recipe_ids,
+                options['favourites_per_user'],
+                options['skew']
+            )
+            carts = self.create_links(
+                UserShoppingCart, 'recipe_id', user_ids, recipe_ids,
+                options['cart_per_user'], options['skew']
+            )
+            authors = sorted({author_id for pk, author_id in recipes})
+            self.rng.shuffle(authors)
+            subscriptions = self.create_links(
+                Subscription, 'subscription_id', user_ids, authors,
+                options['subscriptions_per_user'], options['skew'],
+                user_field='subscriber_id'
+            )
+            rebuild_counters(apps)
+            rebuild_timelines(apps)
+            rebuild_shopping_lists(apps)
+        invalidate_catalog()
+        invalidate_recipes()
+        invalidate_pantry(rebuild=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей {len(user_ids)}, рецептов '
+            f'{len(recipes)}, избранного {favourites}, покупок {carts}, '
+            f'подписок {subscriptions} за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
+
+    def ensure_tags(self):
+        existing = set(Tag.objects.values_list('slug', flat=True))
+        for name, slug in TAGS:
+            if slug not in existing:
+                Tag.objects.create(name=name, slug=slug)
+        return list(Tag.objects.values_list('id', 'bit'))
+
+    def create_users(self, count):
+        prefix = f'synthetic{int(time.time() * 1000)}'
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (User(
+                email=f'{prefix}_{number}@example.com',
+                username=f'{prefix}_{number}',
+                first_name='Синтетический',
+                last_name=f'Пользователь {number}',
+                password=password
+            ) for number in range(count)),
+            batch_size=self.batch_size
+        )
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, user_ids, ingredient_ids, tags, options):
+        rng = self.rng
+        image = placeholder_image()
+        plans = []
+        for author_id in user_ids:
+            count = int(rng.expovariate(1 / options['recipes_per_user']))
+            for number in range(count):
+                recipe_tags = rng.sample(tags, rng.randint(1, 3))
+                plans.append((
+                    Recipe(
+                        author_id=author_id,
+                        name=f'{rng.choice(DISHES)} №{number + 1}',
+                        text='Синтетический рецепт для нагрузочных тестов.',
+                        image=image,
+                        cooking_time=rng.randint(5, 180),
+                        tags_mask=tags_mask(bit for pk, bit in recipe_tags)
+                    ),
+                    [pk for pk, bit in recipe_tags],
+                    rng.sample(
+                        ingredient_ids,
+                        min(len(ingredient_ids),
+                            round(rng.triangular(3, 15, 6)))
+                    ),
+                ))
+        Recipe.objects.bulk_create(
+            (recipe for recipe, tag_ids, recipe_ingredients in plans),
+            batch_size=self.batch_size
+        )
+        created = list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).order_by('id').values_list('id', 'author_id'))
+        now = timezone.now()
+        dated = []
+        for (pk, author_id), (recipe, tag_ids, recipe_ingredients) in zip(
+            created, plans
+        ):
+            recipe.pk = pk
+            recipe.pub_date = recipe.updated_at = now - timedelta(
+                seconds=rng.uniform(0, options['days'] * 86400)
+            )
+            dated.append(recipe)
+        Recipe.objects.bulk_update(
+            dated, ('pub_date', 'updated_at'), batch_size=self.batch_size
+        )
+        TagRecipe.objects.bulk_create(
+            (TagRecipe(recipe_id=recipe.pk, tags_id=tag_id)
+             for recipe, tag_ids, recipe_ingredients in plans
+             for tag_id in tag_ids),
+            batch_size=self.batch_size
+        )
+        IngredientRecipe.objects.bulk_create(
+            (IngredientRecipe(recipe_id=recipe.pk,
+                              ingredients_id=ingredient_id,
+                              amount=rng.randint(1, 500))
+             for recipe, tag_ids, recipe_ingredients in plans
+             for ingredient_id in recipe_ingredients),
+            batch_size=self.batch_size
+        )
+        return created
+
+    def create_links(self, model, target_field, user_ids, targets, mean,
+                     skew, user_field='user_id'):
+        if not targets or not mean:
+            return 0
+        sample = skewed_sampler(targets, skew)
+        rows = [
+            model(**{user_field: user_id, target_field: target})
+            for user_id in user_ids
+            for target in sample(
+                self.rng, int(self.rng.expovariate(1 / mean))
+            )
+            if target != user_id or target_field == 'recipe_id'
+        ]
+        model.objects.bulk_create(
+            rows, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        return len(rows)
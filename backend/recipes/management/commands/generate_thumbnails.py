@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe, User
+from recipes.renditions import create_rendition
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для картинок рецептов и аватаров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать уже существующие миниатюры.'
+        )
+
+    def handle(self, *args, **options):
+        sources = (
+            (Recipe.objects.exclude(image=''), 'image',
+             settings.RECIPE_THUMBNAIL_SIZE),
+            (User.objects.exclude(avatar='').exclude(avatar=None), 'avatar',
+             settings.AVATAR_THUMBNAIL_SIZE),
+        )
+        for queryset, field, size in sources:
+            created = failed = 0
+            for instance in queryset.only('pk', field).iterator():
+                try:
+                    create_rendition(
+                        getattr(instance, field), size, options['force']
+                    )
+                    created += 1
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{instance.pk}: {error}')
+            self.stdout.write(
+                f'{queryset.model._meta.verbose_name_plural}: '
+                f'обработано {created}, ошибок {failed}'
+            )
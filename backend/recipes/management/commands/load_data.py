@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from foodgram.settings import CSV_FILES_DIR
+from recipes.catalog import invalidate_catalog
+from recipes.models import Ingredient
+
+HEADER = ('name', 'measurement_unit')
+
+
+def read_csv(path):
+    with open(path, encoding='UTF-8', newline='') as ingredient_file:
+        for row in csv.reader(ingredient_file):
+            if len(row) >= 2 and tuple(row[:2]) != HEADER:
+                yield row[0], row[1]
+
+
+def read_json(path):
+    with open(path, encoding='UTF-8') as ingredient_file:
+        for item in json.load(ingredient_file):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из ingredients.csv или ingredients.json.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(CSV_FILES_DIR, 'ingredients.csv'),
+            help='Файл с ингредиентами (.csv или .json).'
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1].lstrip('.')
+        )
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        rows = (
+            (name.strip(), unit.strip())
+            for name, unit in READERS[file_format](path)
+            if name.strip() and unit.strip()
+        )
+        started = time.monotonic()
+        if connection.vendor == 'postgresql':
+            total, inserted = self.copy(rows, options['batch_size'])
+        else:
+            total, inserted = self.bulk_insert(rows, options['batch_size'])
+        elapsed = time.monotonic() - started
+        if inserted:
+            invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {total}, добавлено {inserted}, '
+            f'пропущено {total - inserted} за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с).'
+        ))
+
+    @transaction.atomic
+    def bulk_insert(self, rows, batch_size):
+        before = Ingredient.objects.count()
+        total = 0
+        for batch in batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in batch],
+                ignore_conflicts=True
+            )
+            total += len(batch)
+        return total, Ingredient.objects.count() - before
+
+    @transaction.atomic
+    def copy(self, rows, batch_size):
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_load '
+                '(name varchar(128), measurement_unit varchar(64)) '
+                'ON COMMIT DROP'
+            )
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_load FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+                total += len(batch)
+            cursor.execute(
+                f'INSERT INTO {Ingredient._meta.db_table} '
+                '(name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit FROM ingredient_load '
+                'ON CONFLICT DO NOTHING'
+            )
+            return total, cursor.rowcount
@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from recipes.counters import find_drift, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики избранного, рецептов и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать расхождения, ничего не изменяя.'
+        )
+
+    def handle(self, *args, **options):
+        drift = find_drift(apps)
+        for counter, rows in drift.items():
+            self.stdout.write(f'{counter}: расхождений {rows}')
+        if options['check']:
+            if any(drift.values()):
+                self.stderr.write('Счётчики рассинхронизированы.')
+                raise SystemExit(1)
+            return
+        rebuild_counters(apps)
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
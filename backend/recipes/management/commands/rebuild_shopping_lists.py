@@ -0,0 +1,14 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает списки покупок из корзин и ингредиентов.'
+
+    def handle(self, *args, **options):
+        items = rebuild_shopping_lists(apps)
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок пересобраны, позиций: {items}.'
+        ))
@@ -0,0 +1,14 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from recipes.timeline import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет ленты подписок из подписок и рецептов.'
+
+    def handle(self, *args, **options):
+        entries = rebuild_timelines(apps)
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты подписок пересобраны, записей: {entries}.'
+        ))
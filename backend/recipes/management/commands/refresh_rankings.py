@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.cache import invalidate_recipes
+from recipes.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает дневную активность по рецептам и рейтинги '
+        'популярных и набирающих популярность рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересобрать активность за всё время, а не только '
+                 'за самое длинное окно.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Повторять пересчёт каждые RANKING_REFRESH_INTERVAL секунд.'
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            started = time.monotonic()
+            buckets = refresh_rankings(full=full)
+            invalidate_recipes()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги пересчитаны, дневных записей {buckets} за '
+                f'{time.monotonic() - started:.1f} с.'
+            ))
+            if not options['loop']:
+                return
+            full = False
+            close_old_connections()
+            time.sleep(settings.RANKING_REFRESH_INTERVAL)
@@ -0,0 +1,167 @@
+import json
+import platform
+import random
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from recipes.benchmark import summarize
+from recipes.models import Ingredient, Recipe, Tag, User
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет основные эндпоинты внутри процесса и выводит задержки, '
+        'число запросов к БД и пропускную способность в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Запустить только указанные сценарии.'
+        )
+        parser.add_argument(
+            '--user',
+            help='Email пользователя для авторизованных сценариев.'
+        )
+        parser.add_argument('--output', help='Файл для результата.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = self.get_user(options['user'])
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:1000])
+        tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        prefixes = sorted({
+            name[:3] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:500]
+        })
+        if not recipe_ids or not tag_slugs or not prefixes:
+            raise CommandError(
+                'База пуста, сначала выполните load_data и generate_data.'
+            )
+        scenarios = {
+            'recipe_list': (False, lambda: '/api/recipes/'),
+            'recipe_list_page': (False, lambda: (
+                f'/api/recipes/?page={rng.randint(1, 20)}'
+            )),
+            'recipe_list_tags': (False, lambda: (
+                f'/api/recipes/?tags={rng.choice(tag_slugs)}'
+                f'&tags={rng.choice(tag_slugs)}'
+            )),
+            'recipe_list_favorited': (
+                True, lambda: '/api/recipes/?is_favorited=1'
+            ),
+            'recipe_detail': (False, lambda: (
+                f'/api/recipes/{rng.choice(recipe_ids)}/'
+            )),
+            'recipe_detail_auth': (True, lambda: (
+                f'/api/recipes/{rng.choice(recipe_ids)}/'
+            )),
+            'subscriptions': (
+                True, lambda: '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'download_shopping_cart': (
+                True, lambda: '/api/recipes/download_shopping_cart/'
+            ),
+            'ingredient_search': (False, lambda: (
+                f'/api/ingredients/?name={rng.choice(prefixes)}'
+            )),
+        }
+        selected = options['scenario'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}.'
+            )
+        token, created = Token.objects.get_or_create(user=user)
+        anonymous = Client()
+        authenticated = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        results = {}
+        for name in selected:
+            needs_auth, build_path = scenarios[name]
+            results[name] = self.run(
+                authenticated if needs_auth else anonymous,
+                build_path,
+                options['requests'],
+                options['warmup']
+            )
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'ingredients': Ingredient.objects.count(),
+            },
+            'scenarios': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='UTF-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = User.objects.annotate(
+                subscriptions_total=Count('subscriptions')
+            ).order_by('-subscriptions_total', 'id').first()
+        if user is None:
+            raise CommandError('Пользователь для бенчмарка не найден.')
+        return user
+
+    def run(self, client, build_path, total, warmup):
+        for _ in range(warmup):
+            self.fetch(client, build_path())
+        latencies, queries, errors = [], [], 0
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            for _ in range(total):
+                counter.queries = 0
+                path = build_path()
+                request_started = time.perf_counter()
+                status_code = self.fetch(client, path)
+                latencies.append(time.perf_counter() - request_started)
+                queries.append(counter.queries)
+                errors += status_code >= 400
+            elapsed = time.perf_counter() - started
+        stats = summarize(latencies, elapsed, errors)
+        stats['queries_mean'] = round(sum(queries) / len(queries), 2)
+        stats['queries_max'] = max(queries)
+        return stats
+
+    def fetch(self, client, path):
+        response = client.get(path)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
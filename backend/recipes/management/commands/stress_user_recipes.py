@@ -0,0 +1,85 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count, F
+
+from recipes.models import Recipe, User, UserFavourite, UserShoppingCart
+
+MODELS = {
+    'favourite': UserFavourite,
+    'cart': UserShoppingCart,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Параллельно добавляет одни и те же рецепты в избранное и список '
+        'покупок и проверяет, что дубликаты не появились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--recipes', type=int, default=10)
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first()
+        recipe_ids = list(Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        )[:options['recipes']])
+        if user is None or not recipe_ids:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт.')
+        failed = False
+        for name, model in MODELS.items():
+            model.objects.remove(user, recipe_ids)
+            errors = self.hammer(model, user, recipe_ids, options)
+            duplicates = model.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).values('recipe_id').annotate(
+                total=Count('id')
+            ).filter(total__gt=1).count()
+            stored = model.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).count()
+            self.stdout.write(
+                f'{name}: записей {stored} из {len(recipe_ids)}, '
+                f'дубликатов {duplicates}, ошибок блокировки {errors}'
+            )
+            failed |= duplicates > 0 or stored != len(recipe_ids)
+            if model is UserFavourite:
+                drift = Recipe.objects.filter(id__in=recipe_ids).annotate(
+                    actual=Count('userfavorites')
+                ).exclude(favourite_count=F('actual')).count()
+                self.stdout.write(f'{name}: расхождений счётчика {drift}')
+                failed |= drift > 0
+            model.objects.remove(user, recipe_ids)
+        if failed:
+            self.stderr.write('Обнаружены дубликаты или расхождения.')
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS('Дубликатов нет.'))
+
+    def hammer(self, model, user, recipe_ids, options):
+        barrier = threading.Barrier(options['threads'])
+        errors = []
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(options['rounds']):
+                    try:
+                        model.objects.add(user, recipe_ids)
+                    except OperationalError:
+                        errors.append(1)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(errors)
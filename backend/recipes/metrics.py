@@ -0,0 +1,133 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class Series:
+    __slots__ = ('labels', 'latency', 'queries', 'query_time', 'size')
+
+    def __init__(self, route, method):
+        route = route.replace('\\', '\\\\').replace('"', '\\"')
+        self.labels = f'route="{route}",method="{method}"'
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.query_time = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+
+METRICS = (
+    ('http_request_duration_seconds', 'latency',
+     'Время обработки запроса.'),
+    ('http_request_db_queries', 'queries',
+     'Число запросов к базе данных за один запрос.'),
+    ('http_request_db_seconds', 'query_time',
+     'Время запросов к базе данных за один запрос.'),
+    ('http_response_size_bytes', 'size',
+     'Размер тела ответа.'),
+)
+
+
+class Registry:
+
+    def __init__(self):
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, latency, stats, size):
+        key = (route, method)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series(route, method)
+            series.latency.observe(latency)
+            series.queries.observe(stats.queries)
+            series.query_time.observe(stats.query_time)
+            if size is not None:
+                series.size.observe(size)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, attribute, help_text in METRICS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for series in self.series.values():
+                    lines.extend(
+                        getattr(series, attribute).lines(name, series.labels)
+                    )
+        lines.append('')
+        return '\n'.join(lines)
+
+
+registry = Registry()
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.query_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def record_connection_queries(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def route_of(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
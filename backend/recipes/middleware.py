@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from recipes import metrics
+from recipes.catalog import refresh_catalog
+
+
+class HybridMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await self.aprocess_request(request)
+        return await self.get_response(request)
+
+    def process_request(self, request):
+        pass
+
+    async def aprocess_request(self, request):
+        self.process_request(request)
+
+
+class CatalogVersionMiddleware(HybridMiddleware):
+
+    def process_request(self, request):
+        refresh_catalog()
+
+    async def aprocess_request(self, request):
+        await sync_to_async(refresh_catalog, thread_sensitive=False)()
+
+
+class ASGIURLConfMiddleware(HybridMiddleware):
+
+    async def aprocess_request(self, request):
+        request.urlconf = settings.ASGI_URLCONF
+
+
+class MetricsMiddleware(HybridMiddleware):
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    def start(self):
+        stats = metrics.RequestStats()
+        return stats, metrics.current_request.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        metrics.registry.observe(
+            metrics.route_of(request),
+            request.method,
+            time.perf_counter() - started,
+            stats,
+            metrics.response_size(response)
+        )
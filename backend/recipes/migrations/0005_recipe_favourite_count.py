@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    (('recipes', 'Recipe'), 'favourite_count',
+     ('recipes', 'UserFavourite'), 'recipe'),
+    (('users', 'User'), 'recipes_count',
+     ('recipes', 'Recipe'), 'author'),
+    (('users', 'User'), 'subscribers_count',
+     ('users', 'Subscription'), 'subscription'),
+)
+
+
+def rebuild_counters(apps):
+    for model, field, related_model, related_field in COUNTERS:
+        related = apps.get_model(*related_model)
+        apps.get_model(*model).objects.update(**{field: Coalesce(
+            Subquery(
+                related.objects.filter(**{related_field: OuterRef('pk')})
+                .order_by()
+                .values(related_field)
+                .annotate(total=Count('pk'))
+                .values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )})
+
+
+def fill_counters(apps, schema_editor):
+    rebuild_counters(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_idx'),
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favourite_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:46
+
+import re
+
+from django.db import migrations, models
+
+
+def convert_links(apps, schema_editor):
+    Link = apps.get_model('recipes', 'Link')
+    seen = set()
+    for link in Link.objects.order_by('pk'):
+        recipe = re.search(r'/recipes/(\d+)/?$', link.long_link)
+        code = re.search(r'/s/([^/]+)/?$', link.short_link)
+        if recipe is None or code is None or code.group(1) in seen:
+            link.delete()
+            continue
+        seen.add(code.group(1))
+        link.short_link = code.group(1)
+        link.long_link = f'/recipes/{recipe.group(1)}'
+        link.save(update_fields=('short_link', 'long_link'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_favourite_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_links, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='link',
+            name='long_link',
+            field=models.CharField(max_length=256, verbose_name='Путь к рецепту'),
+        ),
+        migrations.AlterField(
+            model_name='link',
+            name='short_link',
+            field=models.CharField(max_length=128, unique=True, verbose_name='Код короткой ссылки'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+MAX_TAGS = 63
+
+
+def fill_tags_mask(apps, schema_editor):
+    Tag = apps.get_model('recipes', 'Tag')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    TagRecipe = apps.get_model('recipes', 'TagRecipe')
+    total = Tag.objects.count()
+    if total > MAX_TAGS:
+        raise RuntimeError(
+            f'В базе {total} тегов, а маска тегов вмещает не больше '
+            f'{MAX_TAGS}. Объедините или удалите лишние теги и повторите '
+            'миграцию.'
+        )
+    bits = {}
+    for bit, tag in enumerate(Tag.objects.order_by('pk')):
+        tag.bit = bit
+        tag.save(update_fields=('bit',))
+        bits[tag.pk] = bit
+    masks = {}
+    for recipe_id, tag_id in TagRecipe.objects.values_list(
+        'recipe_id', 'tags_id'
+    ):
+        masks[recipe_id] = masks.get(recipe_id, 0) | 1 << bits[tag_id]
+    for recipe_id, mask in masks.items():
+        Recipe.objects.filter(pk=recipe_id).update(tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Бит в маске тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, unique=True, verbose_name='Бит в маске тегов'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:05
+
+from django.db import migrations
+from django.db.models import (Count, IntegerField, Min, OuterRef,
+                              Subquery)
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    (('recipes', 'Recipe'), 'favourite_count',
+     ('recipes', 'UserFavourite'), 'recipe'),
+    (('users', 'User'), 'recipes_count',
+     ('recipes', 'Recipe'), 'author'),
+    (('users', 'User'), 'subscribers_count',
+     ('users', 'Subscription'), 'subscription'),
+)
+
+
+def rebuild_counters(apps):
+    for model, field, related_model, related_field in COUNTERS:
+        related = apps.get_model(*related_model)
+        apps.get_model(*model).objects.update(**{field: Coalesce(
+            Subquery(
+                related.objects.filter(**{related_field: OuterRef('pk')})
+                .order_by()
+                .values(related_field)
+                .annotate(total=Count('pk'))
+                .values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )})
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name in ('UserFavourite', 'UserShoppingCart'):
+        model = apps.get_model('recipes', model_name)
+        kept = model.objects.values('user_id', 'recipe_id').annotate(
+            kept_id=Min('id')
+        ).values('kept_id')
+        model.objects.exclude(id__in=kept).delete()
+    rebuild_counters(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_dedupe_user_recipes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='userfavourite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_user_favourite'),
+        ),
+        migrations.AddConstraint(
+            model_name='usershoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_user_shopping_cart'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+PULL_RECIPES_COUNT = 500
+PULL_SUBSCRIBERS_COUNT = 10000
+
+
+def fill_timelines(apps, schema_editor):
+    timeline = apps.get_model('recipes', 'TimelineEntry')._meta.db_table
+    subscription = apps.get_model('users', 'Subscription')._meta.db_table
+    recipe = apps.get_model('recipes', 'Recipe')._meta.db_table
+    user = apps.get_model('users', 'User')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {timeline} '
+            '(user_id, recipe_id, author_id, pub_date) '
+            'SELECT s.subscriber_id, r.id, r.author_id, r.pub_date '
+            f'FROM {subscription} s '
+            f'JOIN {user} u ON u.id = s.subscription_id '
+            f'JOIN {recipe} r ON r.author_id = s.subscription_id '
+            'WHERE u.recipes_count < %s AND u.subscribers_count < %s',
+            [PULL_RECIPES_COUNT, PULL_SUBSCRIBERS_COUNT]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0011_user_recipe_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Ленты подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_created_at(apps, schema_editor):
+    recipe = apps.get_model('recipes', 'Recipe')
+    for name in ('UserFavourite', 'UserShoppingCart'):
+        apps.get_model('recipes', name).objects.update(
+            created_at=Subquery(
+                recipe.objects.filter(pk=OuterRef('recipe_id')).values(
+                    'pub_date'
+                )[:1]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_shopping_list'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userfavourite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='usershoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8, verbose_name='Окно')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.PositiveIntegerField(verbose_name='Очки')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Дата расчёта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'место в рейтинге',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('favourites', models.PositiveIntegerField(default=0, verbose_name='Добавлений в избранное')),
+                ('carts', models.PositiveIntegerField(default=0, verbose_name='Добавлений в список покупок')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reciperanking',
+            index=models.Index(fields=['window', 'position'], name='recipe_ranking_position_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reciperanking',
+            constraint=models.UniqueConstraint(fields=('window', 'recipe'), name='unique_recipe_ranking'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeactivity',
+            index=models.Index(fields=['day'], name='recipe_activity_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'day'), name='unique_recipe_activity_day'),
+        ),
+    ]
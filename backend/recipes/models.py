@@ -1,15 +1,74 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (BooleanField, Exists, F, OuterRef, Value,
+                              Window)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_save
+from django.utils import timezone
 
 from recipes.constants import (MAX_LENGTH_INGREDIENT, MAX_LENGTH_LONG_LINK,
-                               MAX_LENGTH_MEAS_UNIT, MAX_LENGTH_RECIPE,
-                               MAX_LENGTH_SHORT_LINK, MAX_LENGTH_TAG,
-                               MAX_LENGTH_TAG_SLUG)
+                               MAX_LENGTH_MEAS_UNIT, MAX_LENGTH_RANKING_WINDOW,
+                               MAX_LENGTH_RECIPE, MAX_LENGTH_SHORT_LINK,
+                               MAX_LENGTH_TAG, MAX_LENGTH_TAG_SLUG, MAX_TAGS)
+from users.models import Subscription
 
 User = get_user_model()
 
 
+def tags_mask(bits):
+    return sum(1 << bit for bit in set(bits))
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_relations(self):
+        return self.select_related('author').prefetch_related(
+            'recipe_ingredient'
+        ).defer('search_vector')
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                is_author_subscribed=Value(
+                    False, output_field=BooleanField()
+                ),
+            )
+        return self.annotate(
+            is_favorited=Exists(UserFavourite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(UserShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_author_subscribed=Exists(Subscription.objects.filter(
+                subscriber=user, subscription=OuterRef('author')
+            )),
+        )
+
+    def latest_by_author(self, author_ids, limit):
+        if not author_ids:
+            return self.none()
+        ranked = Recipe.objects.filter(author_id__in=author_ids).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('pub_date').desc(), F('id').desc()]
+            )
+        ).values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(id__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            'WHERE ranked.row_number <= %s',
+            (*params, limit)
+        )).order_by('-pub_date', '-id')
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(User,
                                related_name='recipes',
@@ -46,19 +105,52 @@ class Recipe(models.Model):
         auto_now_add=True,
         help_text='Дата и время публикации.'
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата и время изменения',
+        auto_now=True
+    )
+    favourite_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    tags_mask = models.BigIntegerField(
+        verbose_name='Маска тегов',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
-    def favourite_count(self):
-        return UserFavourite.objects.filter(
-            recipe=self
-        ).count()
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ('favourite_count', 'tags_mask')
+            ]
+        super().save(*args, **kwargs)
+
+    def refresh_tags_mask(self, bits=None):
+        if bits is None:
+            bits = self.tags.values_list('bit', flat=True)
+        self.tags_mask = tags_mask(bits)
+        Recipe.objects.filter(pk=self.pk).update(tags_mask=self.tags_mask)
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=('updated_at',),
+                         name='recipe_updated_at_idx'),
+        ]
 
 
 class Tag(models.Model):
@@ -70,10 +162,24 @@ class Tag(models.Model):
                             unique=True,
                             verbose_name='Слаг',
                             help_text='Слаг должен быть уникальным')
+    bit = models.PositiveSmallIntegerField(unique=True,
+                                           editable=False,
+                                           verbose_name='Бит в маске тегов')
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Tag.objects.values_list('bit', flat=True))
+            free = [bit for bit in range(MAX_TAGS) if bit not in used]
+            if not free:
+                raise ValidationError(
+                    f'Нельзя создать больше {MAX_TAGS} тегов.'
+                )
+            self.bit = free[0]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'тег'
         verbose_name_plural = 'Теги'
@@ -146,6 +252,53 @@ class TagRecipe(models.Model):
         return f'{self.tags}-{self.recipe}'
 
 
+class UserRecipeQuerySet(models.QuerySet):
+
+    def add(self, user, recipe_ids):
+        recipe_ids = sorted(set(recipe_ids))
+        if not recipe_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        created_at = timezone.now()
+        added = []
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {self.model._meta.db_table} '
+                    '(user_id, recipe_id, created_at) '
+                    f'SELECT %s, id, %s FROM {Recipe._meta.db_table} '
+                    f'WHERE id IN ({placeholders}) '
+                    'ON CONFLICT DO NOTHING RETURNING id, recipe_id',
+                    [user.pk, created_at, *recipe_ids]
+                )
+                rows = cursor.fetchall()
+            for pk, recipe_id in rows:
+                instance = self.model(
+                    pk=pk, user=user, recipe_id=recipe_id,
+                    created_at=created_at
+                )
+                instance._state.adding = False
+                instance._state.db = self.db
+                post_save.send(
+                    sender=self.model, instance=instance, created=True,
+                    update_fields=None, raw=False, using=self.db
+                )
+                added.append(instance)
+        return added
+
+    def remove(self, user, recipe_ids):
+        queryset = self.filter(user=user, recipe_id__in=recipe_ids)
+        with transaction.atomic(using=self.db):
+            removed = list(
+                queryset.select_for_update().values_list(
+                    'recipe_id', flat=True
+                )
+            )
+            if removed:
+                queryset.delete()
+        return removed
+
+
 class UserFavourite(models.Model):
     user = models.ForeignKey(User,
                              on_delete=models.CASCADE,
@@ -155,10 +308,19 @@ class UserFavourite(models.Model):
                                on_delete=models.CASCADE,
                                verbose_name='Избранные рецепты',
                                related_name='userfavorites')
+    created_at = models.DateTimeField(verbose_name='Дата добавления',
+                                      auto_now_add=True,
+                                      db_index=True)
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'избранный рецепт пользователя'
         verbose_name_plural = 'Избранные рецепты пользователя'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='unique_user_favourite')
+        ]
 
     def __str__(self):
         return f'{self.user}-{self.recipe}'
@@ -173,18 +335,30 @@ class UserShoppingCart(models.Model):
                                on_delete=models.CASCADE,
                                verbose_name='Список покупок',
                                related_name='usershoppingcart')
+    created_at = models.DateTimeField(verbose_name='Дата добавления',
+                                      auto_now_add=True,
+                                      db_index=True)
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'корзина пользователя'
         verbose_name_plural = 'Продукты в корзинах подьзователей'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='unique_user_shopping_cart')
+        ]
 
     def __str__(self):
         return f'{self.user}-{self.recipe}'
 
 
 class Link(models.Model):
-    short_link = models.CharField(max_length=MAX_LENGTH_SHORT_LINK)
-    long_link = models.CharField(max_length=MAX_LENGTH_LONG_LINK)
+    short_link = models.CharField(max_length=MAX_LENGTH_SHORT_LINK,
+                                  unique=True,
+                                  verbose_name='Код короткой ссылки')
+    long_link = models.CharField(max_length=MAX_LENGTH_LONG_LINK,
+                                 verbose_name='Путь к рецепту')
 
     class Meta:
         verbose_name = 'ссылка на рецепт'
@@ -192,3 +366,144 @@ class Link(models.Model):
 
     def __str__(self):
         return f'{self.short_link}-{self.long_link}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             verbose_name='Подписчик',
+                             related_name='timeline')
+    recipe = models.ForeignKey(Recipe,
+                               on_delete=models.CASCADE,
+                               verbose_name='Рецепт',
+                               related_name='timeline_entries')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='+')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-recipe'),
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}-{self.recipe}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(Recipe,
+                               on_delete=models.CASCADE,
+                               verbose_name='Рецепт',
+                               related_name='similar_recipes')
+    similar = models.ForeignKey(Recipe,
+                                on_delete=models.CASCADE,
+                                verbose_name='Похожий рецепт',
+                                related_name='+')
+    score = models.FloatField(verbose_name='Сходство')
+    computed_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'similar'],
+                                    name='unique_similar_recipe')
+        ]
+        indexes = [
+            models.Index(fields=('recipe', '-score'),
+                         name='similar_recipe_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}-{self.similar}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             verbose_name='Пользователь',
+                             related_name='shopping_list')
+    ingredient = models.ForeignKey(Ingredient,
+                                   on_delete=models.CASCADE,
+                                   verbose_name='Ингредиент',
+                                   related_name='+')
+    amount = models.IntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ingredient'],
+                                    name='unique_shopping_list_item')
+        ]
+
+    def __str__(self):
+        return f'{self.user}-{self.ingredient}'
+
+
+class RecipeActivity(models.Model):
+    recipe = models.ForeignKey(Recipe,
+                               on_delete=models.CASCADE,
+                               verbose_name='Рецепт',
+                               related_name='activity')
+    day = models.DateField(verbose_name='День')
+    favourites = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0
+    )
+    carts = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'активность по рецепту'
+        verbose_name_plural = 'Активность по рецептам'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'day'],
+                                    name='unique_recipe_activity_day')
+        ]
+        indexes = [
+            models.Index(fields=('day',), name='recipe_activity_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}-{self.day}'
+
+
+class RecipeRanking(models.Model):
+    window = models.CharField(max_length=MAX_LENGTH_RANKING_WINDOW,
+                              verbose_name='Окно')
+    recipe = models.ForeignKey(Recipe,
+                               on_delete=models.CASCADE,
+                               verbose_name='Рецепт',
+                               related_name='rankings')
+    position = models.PositiveIntegerField(verbose_name='Место')
+    score = models.PositiveIntegerField(verbose_name='Очки')
+    refreshed_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name = 'место в рейтинге'
+        verbose_name_plural = 'Рейтинги рецептов'
+        constraints = [
+            models.UniqueConstraint(fields=['window', 'recipe'],
+                                    name='unique_recipe_ranking')
+        ]
+        indexes = [
+            models.Index(fields=('window', 'position'),
+                         name='recipe_ranking_position_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.window}-{self.position}-{self.recipe}'
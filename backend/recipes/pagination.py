@@ -1,5 +1,128 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.timeline import read_timeline
 
 
 class RecipePagination(PageNumberPagination):
     page_size_query_param = "limit"
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+    def start_page(self, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page'
+        )
+        position, self.reverse = self.decode_cursor(request)
+        return position
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.start_page(request)
+        if position is None:
+            queryset = queryset.order_by(*self.ordering)
+        elif self.reverse:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+            ).order_by('pub_date', 'id')
+        else:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            ).order_by(*self.ordering)
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            pub_date, pk, *reverse = b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None or reverse not in ([], ['r']):
+            raise NotFound(self.invalid_cursor_message)
+        return (pub_date, pk), bool(reverse)
+
+    def encode_cursor(self, instance, reverse=False):
+        position = f'{instance.pub_date.isoformat()}|{instance.pk}'
+        if reverse:
+            position += '|r'
+        encoded = b64encode(position.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+
+class FeedPagination(RecipeCursorPagination):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.start_page(request)
+        if self.reverse:
+            raise NotFound(self.invalid_cursor_message)
+        recipe_ids = read_timeline(
+            request.user, position, self.page_size + 1
+        )
+        self.has_next = len(recipe_ids) > self.page_size
+        self.has_previous = False
+        recipe_ids = recipe_ids[:self.page_size]
+        recipes = queryset.in_bulk(recipe_ids)
+        self.page = [recipes[pk] for pk in recipe_ids if pk in recipes]
+        return self.page
@@ -0,0 +1,113 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+
+from recipes.cache import incr_counter
+from recipes.models import IngredientRecipe
+
+VERSION_KEY = 'pantry:version'
+REBUILD_KEY = 'pantry:rebuild'
+OVERLAP = timedelta(minutes=1)
+
+_state = {'index': None}
+_lock = threading.Lock()
+
+
+class PantryIndex:
+
+    def __init__(self, rebuild):
+        self.rebuild = rebuild
+        self.version = None
+        self.watermark = None
+        self.state = (
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), {}
+        )
+
+    def refresh(self, version):
+        rows = IngredientRecipe.objects.values_list(
+            'recipe_id', 'ingredients_id', 'recipe__updated_at'
+        )
+        if self.watermark is not None:
+            rows = rows.filter(
+                recipe__updated_at__gte=self.watermark - OVERLAP
+            )
+        rows = list(rows)
+        if rows:
+            self.apply(np.array(
+                [(recipe_id, ingredient_id)
+                 for recipe_id, ingredient_id, updated_at in rows],
+                dtype=np.int64
+            ))
+            self.watermark = max(
+                updated_at for recipe_id, ingredient_id, updated_at in rows
+            )
+        self.version = version
+
+    def apply(self, pairs):
+        recipe_ids, sizes, postings = self.state
+        added = np.setdiff1d(pairs[:, 0], recipe_ids)
+        recipe_ids = np.concatenate((recipe_ids, added))
+        sizes = np.concatenate(
+            (sizes, np.zeros(len(added), dtype=np.int32))
+        )
+        order = np.argsort(recipe_ids, kind='stable')
+        positions = order[np.searchsorted(recipe_ids[order], pairs[:, 0])]
+        changed = np.unique(positions)
+        postings = dict(postings)
+        for ingredient_id, posting in postings.items():
+            stale = np.isin(posting, changed, assume_unique=True)
+            if stale.any():
+                postings[ingredient_id] = posting[~stale]
+        sizes[changed] = 0
+        np.add.at(sizes, positions, 1)
+        order = np.lexsort((positions, pairs[:, 1]))
+        ingredient_ids, starts = np.unique(
+            pairs[order, 1], return_index=True
+        )
+        for ingredient_id, added in zip(
+            ingredient_ids.tolist(), np.split(positions[order], starts[1:])
+        ):
+            posting = postings.get(ingredient_id)
+            postings[ingredient_id] = (
+                np.unique(added) if posting is None
+                else np.union1d(posting, added)
+            )
+        self.state = (recipe_ids, sizes, postings)
+
+    def match(self, ingredient_ids, max_missing, limit):
+        recipe_ids, sizes, postings = self.state
+        postings = [
+            postings[pk] for pk in set(ingredient_ids) if pk in postings
+        ]
+        if not postings:
+            return []
+        covered = np.bincount(
+            np.concatenate(postings), minlength=len(recipe_ids)
+        )
+        candidates = np.flatnonzero(covered)
+        missing = 1 - covered[candidates] / sizes[candidates]
+        fits = missing <= max_missing
+        candidates, missing = candidates[fits], missing[fits]
+        order = np.lexsort((-recipe_ids[candidates], missing))[:limit]
+        return recipe_ids[candidates[order]].tolist()
+
+
+def get_pantry():
+    state = cache.get_many((VERSION_KEY, REBUILD_KEY))
+    version = state.get(VERSION_KEY, 0)
+    rebuild = state.get(REBUILD_KEY, 0)
+    with _lock:
+        index = _state['index']
+        if index is None or index.rebuild != rebuild:
+            index = _state['index'] = PantryIndex(rebuild)
+        if index.version != version:
+            index.refresh(version)
+        return index
+
+
+def invalidate_pantry(rebuild=False):
+    if rebuild:
+        incr_counter(REBUILD_KEY)
+    incr_counter(VERSION_KEY)
@@ -0,0 +1,91 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipes.models import (RecipeActivity, RecipeRanking, UserFavourite,
+                            UserShoppingCart)
+
+WINDOW_ALL = 'all'
+ACTIVITY_SOURCES = (
+    (UserFavourite, 'favourites'),
+    (UserShoppingCart, 'carts'),
+)
+
+
+def windows():
+    return {**settings.TRENDING_WINDOWS, WINDOW_ALL: None}
+
+
+def refreshed_at(window):
+    return RecipeRanking.objects.filter(window=window).order_by(
+        'position'
+    ).values_list('refreshed_at', flat=True).first()
+
+
+def refresh_activity(since=None):
+    buckets = {}
+    for model, field in ACTIVITY_SOURCES:
+        rows = model.objects.all()
+        if since is not None:
+            rows = rows.filter(created_at__gte=timezone.make_aware(
+                datetime.combine(since, time.min), timezone.utc
+            ))
+        for row in rows.annotate(
+            day=TruncDate('created_at', tzinfo=timezone.utc)
+        ).values('recipe_id', 'day').annotate(total=Count('id')).order_by():
+            bucket = buckets.setdefault(
+                (row['recipe_id'], row['day']),
+                RecipeActivity(recipe_id=row['recipe_id'], day=row['day'])
+            )
+            setattr(bucket, field, row['total'])
+    stale = RecipeActivity.objects.all()
+    if since is not None:
+        stale = stale.filter(day__gte=since)
+    stale.delete()
+    RecipeActivity.objects.bulk_create(
+        buckets.values(), batch_size=settings.FEED_BATCH_SIZE
+    )
+    return len(buckets)
+
+
+def refresh_ranking(window, days, now):
+    buckets = RecipeActivity.objects.all()
+    if days is not None:
+        buckets = buckets.filter(
+            day__gt=now.astimezone(timezone.utc).date() - timedelta(days=days)
+        )
+    scores = buckets.values('recipe_id').annotate(score=Sum(
+        F('favourites') * settings.RANKING_FAVOURITE_WEIGHT
+        + F('carts') * settings.RANKING_CART_WEIGHT
+    )).filter(score__gt=0).order_by('-score', '-recipe_id')
+    RecipeRanking.objects.filter(window=window).delete()
+    RecipeRanking.objects.bulk_create(
+        (RecipeRanking(
+            window=window,
+            recipe_id=row['recipe_id'],
+            position=position,
+            score=row['score'],
+            refreshed_at=now
+        ) for position, row in enumerate(
+            scores[:settings.RANKING_SIZE], start=1
+        )),
+        batch_size=settings.FEED_BATCH_SIZE
+    )
+
+
+@transaction.atomic
+def refresh_rankings(full=False):
+    now = timezone.now()
+    since = None
+    if not full and RecipeActivity.objects.exists():
+        since = now.astimezone(timezone.utc).date() - timedelta(
+            days=max(settings.TRENDING_WINDOWS.values())
+        )
+    buckets = refresh_activity(since)
+    for window, days in windows().items():
+        refresh_ranking(window, days, now)
+    return buckets
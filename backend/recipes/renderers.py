@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ShopCartCSVRenderer(JSONRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class ShopCartTextRenderer(JSONRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
@@ -0,0 +1,63 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+THUMBNAIL_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+logger = logging.getLogger(__name__)
+_existing = set()
+
+
+def rendition_name(name):
+    root, _ = os.path.splitext(name)
+    extension = THUMBNAIL_EXTENSIONS[settings.THUMBNAIL_FORMAT]
+    return f'{root}_thumb.{extension}'
+
+
+def create_rendition(field_file, size, force=False):
+    if not field_file:
+        return None
+    name = rendition_name(field_file.name)
+    storage = field_file.storage
+    if storage.exists(name):
+        if not force:
+            return name
+        storage.delete(name)
+    with storage.open(field_file.name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = ImageOps.fit(
+            image.convert('RGB'), size, Image.Resampling.LANCZOS
+        )
+    buffer = BytesIO()
+    image.save(
+        buffer, settings.THUMBNAIL_FORMAT, quality=settings.THUMBNAIL_QUALITY
+    )
+    name = storage.save(name, ContentFile(buffer.getvalue()))
+    _existing.add(name)
+    return name
+
+
+def try_create_rendition(field_file, size):
+    try:
+        return create_rendition(field_file, size)
+    except (OSError, ValueError):
+        logger.warning(
+            'Не удалось создать миниатюру для %s', field_file.name,
+            exc_info=True
+        )
+        return None
+
+
+def rendition_url(field_file):
+    if not field_file:
+        return None
+    name = rendition_name(field_file.name)
+    if name not in _existing:
+        if not field_file.storage.exists(name):
+            return None
+        _existing.add(name)
+    return field_file.storage.url(name)
@@ -2,9 +2,13 @@
 from django.db import transaction
 from rest_framework import serializers
 
-from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
-                            TagRecipe, UserFavourite, UserShoppingCart)
-from recipes.utils import Base64ImageField
+from recipes.catalog import get_catalog
+from recipes.constants import MAX_BULK_RECIPES
+from recipes.models import (Ingredient, IngredientRecipe, Recipe,
+                            ShoppingListItem, SimilarRecipe, Tag, TagRecipe,
+                            UserFavourite, UserShoppingCart)
+from recipes.shopping_list import cart_users, change_amounts
+from recipes.utils import Base64ImageField, ThumbnailField
 from users.models import Subscription
 from users.serializers import UserSerializer
 
@@ -20,19 +24,30 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ('id', 'name', 'slug')
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.ReadOnlyField(source='ingredients.id')
-    name = serializers.ReadOnlyField(source='ingredients.name')
-    measurement_unit = serializers.ReadOnlyField(
-        source='ingredients.measurement_unit')
+    id = serializers.ReadOnlyField(source='ingredients_id')
+    name = serializers.SerializerMethodField()
+    measurement_unit = serializers.SerializerMethodField()
 
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
+    def get_ingredient(self, obj):
+        ingredient = get_catalog().ingredient(obj.ingredients_id)
+        if ingredient is None:
+            ingredient = IngredientSerializer(obj.ingredients).data
+        return ingredient
+
+    def get_name(self, obj):
+        return self.get_ingredient(obj)['name']
+
+    def get_measurement_unit(self, obj):
+        return self.get_ingredient(obj)['measurement_unit']
+
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     tags = serializers.ListField(child=serializers.IntegerField())
@@ -51,48 +66,131 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         ingredients = data.get('ingredients')
         tags = data.get('tags')
-        if not ingredients:
+        if not ingredients and not (
+            self.partial and 'ingredients' not in data
+        ):
             raise serializers.ValidationError(
                 'Вы должны выбрать хотя бы один ингредиент.'
             )
-        if not tags:
+        if not tags and not (self.partial and 'tags' not in data):
             raise serializers.ValidationError(
                 'Вы должны выбрать хотя бы один тег.'
             )
-        ingredient_ids = [ingredient['id'] for ingredient in ingredients]
-        existing_ingredients = Ingredient.objects.filter(id__in=ingredient_ids)
-        if existing_ingredients.count() != len(ingredient_ids):
+        catalog = get_catalog()
+        if ingredients is not None:
+            self.validate_recipe_ingredients(catalog, ingredients)
+        if tags is not None and (
+            len(set(tags)) != len(tags)
+            or not catalog.has_tags(tags)
+            and Tag.objects.filter(id__in=tags).count() != len(tags)
+        ):
             raise serializers.ValidationError(
-                'Вы ввели несуществующий ингредиент.'
+                'Вы ввели несуществующий тег.'
             )
-        existing_tags = Tag.objects.filter(id__in=tags)
-        if existing_tags.count() != len(tags):
+        return data
+
+    def validate_recipe_ingredients(self, catalog, ingredients):
+        ingredient_ids = [int(ingredient['id']) for ingredient in ingredients]
+        if (
+            len(set(ingredient_ids)) != len(ingredient_ids)
+            or not catalog.has_ingredients(ingredient_ids)
+            and Ingredient.objects.filter(
+                id__in=ingredient_ids
+            ).count() != len(ingredient_ids)
+        ):
             raise serializers.ValidationError(
-                'Вы ввели несуществующий тег.'
+                'Вы ввели несуществующий ингредиент.'
             )
         for ingridient_dict in ingredients:
             if int(ingridient_dict['amount']) < 1:
                 raise serializers.ValidationError(
                     'Количество ингредиента должно быть не меньше 1.'
                 )
-        return data
 
-    def create_or_update_recipe_relations(
-        self, recipe, tags_id, ingredients_list
-    ):
-        tags = Tag.objects.filter(id__in=tags_id)
-        tag_recipes = [TagRecipe(tags=tag, recipe=recipe) for tag in tags]
-        TagRecipe.objects.bulk_create(tag_recipes)
+    def update_recipe_tags(self, recipe, tags_id, created):
+        existing = (
+            {} if created else dict(
+                TagRecipe.objects.filter(recipe=recipe)
+                .values_list('id', 'tags_id')
+            )
+        )
+        tags_id = set(tags_id)
+        kept = set()
+        removed = []
+        for pk, tag_id in existing.items():
+            if tag_id in tags_id and tag_id not in kept:
+                kept.add(tag_id)
+            else:
+                removed.append(pk)
+        added = [
+            TagRecipe(tags_id=tag_id, recipe=recipe)
+            for tag_id in tags_id - kept
+        ]
+        if removed:
+            TagRecipe.objects.filter(id__in=removed).delete()
+        if added:
+            TagRecipe.objects.bulk_create(added)
+        if removed or added:
+            bits = get_catalog().tag_bits
+            recipe.refresh_tags_mask(
+                [bits[tag_id] for tag_id in tags_id]
+                if all(tag_id in bits for tag_id in tags_id) else None
+            )
 
-        ingredient_recipes = [
+    def update_recipe_ingredients(self, recipe, ingredients_list, created):
+        existing = (
+            [] if created
+            else IngredientRecipe.objects.filter(recipe=recipe)
+        )
+        amounts = {
+            int(ingredient['id']): int(ingredient['amount'])
+            for ingredient in ingredients_list
+        }
+        kept = set()
+        changed = []
+        removed = []
+        deltas = {}
+        for ingredient_recipe in existing:
+            ingredient_id = ingredient_recipe.ingredients_id
+            if ingredient_id not in amounts or ingredient_id in kept:
+                removed.append(ingredient_recipe.id)
+                continue
+            kept.add(ingredient_id)
+            if ingredient_recipe.amount != amounts[ingredient_id]:
+                deltas[ingredient_id] = (
+                    amounts[ingredient_id] - ingredient_recipe.amount
+                )
+                ingredient_recipe.amount = amounts[ingredient_id]
+                changed.append(ingredient_recipe)
+        added = [
             IngredientRecipe(
-                ingredients_id=ingredient['id'],
-                amount=ingredient['amount'],
+                ingredients_id=ingredient_id,
+                amount=amount,
                 recipe=recipe
             )
-            for ingredient in ingredients_list
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in kept
         ]
-        IngredientRecipe.objects.bulk_create(ingredient_recipes)
+        if removed:
+            IngredientRecipe.objects.filter(id__in=removed).delete()
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ('amount',))
+        if added:
+            IngredientRecipe.objects.bulk_create(added)
+        if not created:
+            for ingredient_recipe in added:
+                deltas[ingredient_recipe.ingredients_id] = (
+                    ingredient_recipe.amount
+                )
+            change_amounts(cart_users(recipe.pk), deltas)
+
+    def create_or_update_recipe_relations(
+        self, recipe, tags_id, ingredients_list, created=False
+    ):
+        if tags_id is not None:
+            self.update_recipe_tags(recipe, tags_id, created)
+        if ingredients_list is not None:
+            self.update_recipe_ingredients(recipe, ingredients_list, created)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -102,14 +200,15 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         self.create_or_update_recipe_relations(
             recipe,
             tags_id,
-            ingredients_list
+            ingredients_list,
+            created=True
         )
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags_id = validated_data.pop('tags', [])
-        ingredients_list = validated_data.pop('ingredients', [])
+        tags_id = validated_data.pop('tags', None)
+        ingredients_list = validated_data.pop('ingredients', None)
         recipe = super().update(instance, validated_data)
         self.create_or_update_recipe_relations(
             recipe,
@@ -121,22 +220,38 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
 class RecipeSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    tags = serializers.SerializerMethodField()
     ingredients = IngredientRecipeSerializer(
         many=True, source='recipe_ingredient', read_only=True
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_thumbnail = ThumbnailField(source='image')
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'text', 'ingredients', 'image', 'tags',
-            'cooking_time', 'author', 'is_favorited', 'is_in_shopping_cart'
+            'id', 'name', 'text', 'ingredients', 'image', 'image_thumbnail',
+            'tags', 'cooking_time', 'author', 'is_favorited',
+            'is_in_shopping_cart'
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_author_subscribed'):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
+    def get_tags(self, obj):
+        catalog = get_catalog()
+        return [
+            tag for tag in catalog.tag_list
+            if obj.tags_mask >> catalog.tag_bits[tag['id']] & 1
+        ]
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return UserFavourite.objects.filter(
@@ -144,6 +259,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return UserShoppingCart.objects.filter(
@@ -153,11 +270,12 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipeSubscriptionSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
+    image_thumbnail = ThumbnailField(source='image')
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'image', 'cooking_time',
+            'id', 'name', 'image', 'image_thumbnail', 'cooking_time',
         )
 
 
@@ -169,30 +287,34 @@ class SubscriptionListSerializer(serializers.ModelSerializer):
     last_name = serializers.ReadOnlyField(source='subscription.last_name')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField(
+        source='subscription.recipes_count'
+    )
     avatar = Base64ImageField(source='subscription.avatar', required=False)
+    avatar_thumbnail = ThumbnailField(source='subscription.avatar')
 
     def get_is_subscribed(self, obj):
         return True
 
     def get_recipes(self, obj):
         user = obj.subscription
-        recipes_limit = int(self.context['request'].GET.get(
-            'recipes_limit', 3
-        ))
-        user_recipes = user.recipes.all()[:recipes_limit]
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            user_recipes = recipes_by_author.get(user.id, [])
+        else:
+            recipes_limit = int(self.context['request'].GET.get(
+                'recipes_limit', 3
+            ))
+            user_recipes = user.recipes.all()[:recipes_limit]
         serialized_recipes = RecipeSubscriptionSerializer(
             user_recipes, many=True
         )
         return serialized_recipes.data
 
-    def get_recipes_count(self, obj):
-        user_recipes_count = obj.subscription.recipes.count()
-        return user_recipes_count
-
     class Meta:
         fields = ('id', 'email', 'username', 'first_name', 'last_name',
-                  'avatar', 'is_subscribed', 'recipes', 'recipes_count', )
+                  'avatar', 'avatar_thumbnail', 'is_subscribed', 'recipes',
+                  'recipes_count', )
         model = Subscription
 
 
@@ -212,10 +334,11 @@ class UserFavouriteAndShoppingCartSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='recipe.id')
     name = serializers.ReadOnlyField(source='recipe.name')
     image = Base64ImageField(source='recipe.image')
+    image_thumbnail = ThumbnailField(source='recipe.image')
     cooking_time = serializers.ReadOnlyField(source='recipe.cooking_time')
 
     class Meta:
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
 
 
 class UserFavouriteSerializer(UserFavouriteAndShoppingCartSerializer):
@@ -230,3 +353,50 @@ class UserShoppingCartSerializer(UserFavouriteAndShoppingCartSerializer):
 
     class Meta(UserFavouriteAndShoppingCartSerializer.Meta):
         model = UserShoppingCart
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES
+    )
+
+    def validate_recipes(self, value):
+        value = list(dict.fromkeys(value))
+        found = set(Recipe.objects.filter(
+            id__in=value
+        ).values_list('id', flat=True))
+        missing = [pk for pk in value if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                'Рецептов с id '
+                f'{", ".join(map(str, missing))} не существует.'
+            )
+        return value
+
+
+class SimilarRecipeSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='similar.id')
+    name = serializers.ReadOnlyField(source='similar.name')
+    image = Base64ImageField(source='similar.image')
+    image_thumbnail = ThumbnailField(source='similar.image')
+    cooking_time = serializers.ReadOnlyField(source='similar.cooking_time')
+
+    class Meta:
+        model = SimilarRecipe
+        fields = (
+            'id', 'name', 'image', 'image_thumbnail', 'cooking_time', 'score'
+        )
+
+
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
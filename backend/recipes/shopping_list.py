@@ -0,0 +1,64 @@
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+
+from recipes.models import IngredientRecipe, ShoppingListItem, UserShoppingCart
+
+BATCH_SIZE = 1000
+
+
+def cart_users(recipe_id):
+    return UserShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True)
+
+
+def recipe_amounts(recipe_id, sign=1):
+    amounts = {}
+    for ingredient_id, amount in IngredientRecipe.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredients_id', 'amount'):
+        amounts[ingredient_id] = amounts.get(ingredient_id, 0) + sign * amount
+    return amounts
+
+
+def change_amounts(user_ids, amounts):
+    amounts = {pk: amount for pk, amount in amounts.items() if amount}
+    if not amounts:
+        return
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    added = [pk for pk, amount in amounts.items() if amount > 0]
+    if added:
+        ShoppingListItem.objects.bulk_create(
+            (ShoppingListItem(user_id=user_id, ingredient_id=pk, amount=0)
+             for user_id in user_ids for pk in added),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=list(amounts)
+    )
+    items.update(amount=F('amount') + Case(
+        *(When(ingredient_id=pk, then=Value(amount))
+          for pk, amount in amounts.items()),
+        default=Value(0)
+    ))
+    items.filter(amount__lte=0).delete()
+
+
+@transaction.atomic
+def rebuild_shopping_lists(apps):
+    item = apps.get_model('recipes', 'ShoppingListItem')._meta.db_table
+    cart = apps.get_model('recipes', 'UserShoppingCart')._meta.db_table
+    ingredient = apps.get_model('recipes', 'IngredientRecipe')._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {item}')
+        cursor.execute(
+            f'INSERT INTO {item} (user_id, ingredient_id, amount) '
+            'SELECT c.user_id, i.ingredients_id, SUM(i.amount) '
+            f'FROM {cart} c '
+            f'JOIN {ingredient} i ON i.recipe_id = c.recipe_id '
+            'GROUP BY c.user_id, i.ingredients_id'
+        )
+        return cursor.rowcount
@@ -0,0 +1,202 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipes.cache import invalidate_recipes
+from recipes.catalog import invalidate_catalog
+from recipes.conditional import bump_user_state
+from recipes.models import (Ingredient, IngredientRecipe, Recipe,
+                            Subscription, Tag, TagRecipe, User,
+                            UserFavourite, UserShoppingCart)
+from recipes.pantry import invalidate_pantry
+from recipes.renditions import try_create_rendition
+from recipes.shopping_list import cart_users, change_amounts, recipe_amounts
+from recipes.timeline import backfill, fan_out, prune, refresh_feed_mode
+
+USER_SERIALIZED_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name', 'avatar')
+)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    invalidate_recipes(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver((post_save, post_delete), sender=TagRecipe)
+def invalidate_recipe_relation(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        updated_at=timezone.now()
+    )
+    invalidate_recipes(instance.recipe_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, update_fields=None,
+                              created=False, **kwargs):
+    if created:
+        return
+    if not instance.changed_fields(
+        USER_SERIALIZED_FIELDS & set(update_fields or USER_SERIALIZED_FIELDS)
+    ):
+        return
+    recipes = Recipe.objects.filter(author_id=instance.pk)
+    recipe_ids = list(recipes.values_list('pk', flat=True))
+    if recipe_ids:
+        recipes.update(updated_at=timezone.now())
+        invalidate_recipes(*recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    User.objects.filter(
+        pk=instance.author_id, recipes_count__gt=0
+    ).update(
+        recipes_count=F('recipes_count') - 1
+    )
+
+
+@receiver(post_save, sender=UserFavourite)
+def increment_favourite_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favourite_count=F('favourite_count') + 1
+        )
+
+
+@receiver(post_delete, sender=UserFavourite)
+def decrement_favourite_count(sender, instance, **kwargs):
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favourite_count__gt=0
+    ).update(
+        favourite_count=F('favourite_count') - 1
+    )
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def rebuild_catalog(sender, **kwargs):
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver(post_save, sender=Recipe)
+def refresh_pantry(sender, **kwargs):
+    transaction.on_commit(invalidate_pantry)
+
+
+@receiver(post_delete, sender=Recipe)
+def rebuild_pantry(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate_pantry(rebuild=True))
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_thumbnail(sender, instance, **kwargs):
+    transaction.on_commit(lambda: try_create_rendition(
+        instance.image, settings.RECIPE_THUMBNAIL_SIZE
+    ))
+
+
+@receiver(post_save, sender=User)
+def create_avatar_thumbnail(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'avatar' not in update_fields:
+        return
+    transaction.on_commit(lambda: try_create_rendition(
+        instance.avatar, settings.AVATAR_THUMBNAIL_SIZE
+    ))
+
+
+@receiver((post_save, post_delete), sender=TagRecipe)
+def refresh_recipe_tags_mask(sender, instance, **kwargs):
+    Recipe(pk=instance.recipe_id).refresh_tags_mask()
+
+
+@receiver((post_save, post_delete), sender=UserFavourite)
+@receiver((post_save, post_delete), sender=UserShoppingCart)
+def bump_recipe_user_state(sender, instance, **kwargs):
+    bump_user_state(instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def bump_subscriber_state(sender, instance, **kwargs):
+    bump_user_state(instance.subscriber_id)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created and not refresh_feed_mode(instance.author_id):
+        fan_out(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def refresh_author_feed_mode(sender, instance, **kwargs):
+    refresh_feed_mode(instance.author_id)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and not refresh_feed_mode(instance.subscription_id):
+        backfill(instance.subscriber_id, instance.subscription_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def prune_timeline(sender, instance, **kwargs):
+    prune(instance.subscriber_id, instance.subscription_id)
+    refresh_feed_mode(instance.subscription_id)
+
+
+@receiver(post_save, sender=UserShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        change_amounts(
+            [instance.user_id], recipe_amounts(instance.recipe_id)
+        )
+
+
+@receiver(post_delete, sender=UserShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    change_amounts(
+        [instance.user_id], recipe_amounts(instance.recipe_id, sign=-1)
+    )
+
+
+@receiver(pre_save, sender=IngredientRecipe)
+def withdraw_ingredient_amount(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    previous = IngredientRecipe.objects.filter(pk=instance.pk).values_list(
+        'ingredients_id', 'amount'
+    ).first()
+    if previous:
+        ingredient_id, amount = previous
+        change_amounts(
+            cart_users(instance.recipe_id), {ingredient_id: -amount}
+        )
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def add_ingredient_amount(sender, instance, **kwargs):
+    change_amounts(
+        cart_users(instance.recipe_id),
+        {instance.ingredients_id: instance.amount}
+    )
+
+
+@receiver(post_delete, sender=IngredientRecipe)
+def remove_ingredient_amount(sender, instance, **kwargs):
+    change_amounts(
+        cart_users(instance.recipe_id),
+        {instance.ingredients_id: -instance.amount}
+    )
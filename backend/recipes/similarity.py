@@ -0,0 +1,68 @@
+import numpy as np
+from scipy import sparse
+
+from recipes.models import IngredientRecipe
+
+
+def ingredient_matrix():
+    rows = np.array(
+        IngredientRecipe.objects.values_list(
+            'recipe_id', 'ingredients_id'
+        ).distinct(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    recipe_ids, recipe_index = np.unique(rows[:, 0], return_inverse=True)
+    ingredient_ids, ingredient_index = np.unique(
+        rows[:, 1], return_inverse=True
+    )
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32),
+         (recipe_index, ingredient_index)),
+        shape=(len(recipe_ids), len(ingredient_ids))
+    )
+    return recipe_ids, matrix
+
+
+def top_neighbours(recipe_ids, matrix, positions, k, batch_size):
+    sizes = np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(positions), batch_size):
+        batch = positions[start:start + batch_size]
+        overlap = (matrix[batch] @ transposed).tocsr()
+        for row, position in enumerate(batch):
+            begin, end = overlap.indptr[row], overlap.indptr[row + 1]
+            columns = overlap.indices[begin:end]
+            shared = overlap.data[begin:end]
+            keep = columns != position
+            columns, shared = columns[keep], shared[keep]
+            if not len(columns):
+                yield recipe_ids[position], [], []
+                continue
+            scores = shared / (sizes[position] + sizes[columns] - shared)
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+                columns, scores = columns[best], scores[best]
+            order = np.lexsort((recipe_ids[columns], -scores))
+            yield (
+                recipe_ids[position],
+                recipe_ids[columns[order]].tolist(),
+                scores[order].tolist(),
+            )
+
+
+def affected_positions(recipe_ids, matrix, changed, thresholds, k):
+    changed_positions = np.flatnonzero(np.isin(recipe_ids, changed))
+    if not len(changed_positions):
+        return changed_positions
+    sizes = np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+    overlap = (matrix[changed_positions] @ matrix.T).tocoo()
+    shared = overlap.data
+    columns = overlap.col
+    scores = shared / (
+        sizes[changed_positions[overlap.row]] + sizes[columns] - shared
+    )
+    minimum = np.array(
+        [thresholds.get(pk, (0.0, 0)) for pk in recipe_ids[columns]]
+    ).reshape(-1, 2)
+    beaten = (scores > minimum[:, 0]) | (minimum[:, 1] < k)
+    return np.union1d(changed_positions, np.unique(columns[beaten]))
@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from recipes.models import Recipe, TimelineEntry
+from users.models import Subscription, User
+
+
+def _pull_condition(prefix=''):
+    return Q(**{
+        f'{prefix}recipes_count__gte': settings.FEED_PULL_RECIPES_COUNT
+    }) | Q(**{
+        f'{prefix}subscribers_count__gte': (
+            settings.FEED_PULL_SUBSCRIBERS_COUNT
+        )
+    })
+
+
+def _push_condition(prefix=''):
+    return Q(**{
+        f'{prefix}recipes_count__lt': settings.FEED_PUSH_RECIPES_COUNT,
+        f'{prefix}subscribers_count__lt': settings.FEED_PUSH_SUBSCRIBERS_COUNT
+    })
+
+
+@transaction.atomic
+def refresh_feed_mode(author_id):
+    authors = User.objects.filter(pk=author_id)
+    if authors.filter(_pull_condition(), feed_pulled=False).update(
+        feed_pulled=True
+    ):
+        return True
+    if authors.filter(_push_condition(), feed_pulled=True).update(
+        feed_pulled=False
+    ):
+        _insert_entries('s.subscription_id = %s', [author_id])
+        return False
+    return authors.filter(feed_pulled=True).exists()
+
+
+def pulled_authors(user):
+    return Subscription.objects.filter(
+        subscriber=user, subscription__feed_pulled=True
+    ).values_list('subscription_id', flat=True)
+
+
+def fan_out(recipe):
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(
+            user_id=subscriber_id,
+            recipe_id=recipe.pk,
+            author_id=recipe.author_id,
+            pub_date=recipe.pub_date
+        ) for subscriber_id in Subscription.objects.filter(
+            subscription_id=recipe.author_id
+        ).values_list('subscriber_id', flat=True).iterator()),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def _insert_entries(condition, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            '(user_id, recipe_id, author_id, pub_date) '
+            'SELECT s.subscriber_id, r.id, r.author_id, r.pub_date '
+            f'FROM {Subscription._meta.db_table} s '
+            f'JOIN {Recipe._meta.db_table} r '
+            'ON r.author_id = s.subscription_id '
+            f'WHERE {condition} ON CONFLICT DO NOTHING',
+            params
+        )
+
+
+def backfill(subscriber_id, author_id):
+    _insert_entries(
+        's.subscription_id = %s AND s.subscriber_id = %s',
+        [author_id, subscriber_id]
+    )
+
+
+def prune(subscriber_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=subscriber_id, author_id=author_id
+    ).delete()
+
+
+def _before(position, id_field):
+    if position is None:
+        return Q()
+    pub_date, pk = position
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{id_field}__lt': pk}
+    )
+
+
+def read_timeline(user, position, limit):
+    rows = list(TimelineEntry.objects.filter(
+        _before(position, 'recipe_id'), user=user
+    ).order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit])
+    author_ids = list(pulled_authors(user))
+    if author_ids:
+        rows.extend(Recipe.objects.filter(
+            _before(position, 'id'), author_id__in=author_ids
+        ).order_by('-pub_date', '-id').values_list(
+            'pub_date', 'id'
+        )[:limit])
+        rows = sorted(set(rows), reverse=True)[:limit]
+    return [pk for pub_date, pk in rows]
+
+
+@transaction.atomic
+def rebuild_timelines(apps):
+    users = apps.get_model('users', 'User').objects
+    users.filter(_pull_condition()).update(feed_pulled=True)
+    users.filter(_push_condition()).update(feed_pulled=False)
+    timeline = apps.get_model('recipes', 'TimelineEntry')._meta.db_table
+    subscription = apps.get_model('users', 'Subscription')._meta.db_table
+    recipe = apps.get_model('recipes', 'Recipe')._meta.db_table
+    user = users.model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {timeline}')
+        cursor.execute(
+            f'INSERT INTO {timeline} '
+            '(user_id, recipe_id, author_id, pub_date) '
+            'SELECT s.subscriber_id, r.id, r.author_id, r.pub_date '
+            f'FROM {subscription} s '
+            f'JOIN {user} u ON u.id = s.subscription_id '
+            f'JOIN {recipe} r ON r.author_id = s.subscription_id '
+            'WHERE NOT u.feed_pulled'
+        )
+        return cursor.rowcount
@@ -1,10 +1,16 @@
 import base64
+import csv
+import json
+import string
+import threading
+from collections import OrderedDict
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db.models import Sum, F
 from rest_framework import serializers
 
-from recipes.models import IngredientRecipe
+from recipes.models import Link, Recipe, ShoppingListItem
+from recipes.renditions import rendition_url
 
 
 class Base64ImageField(serializers.ImageField):
@@ -17,20 +23,118 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class ThumbnailField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        url = rendition_url(value)
+        request = self.context.get('request')
+        if url is None or request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+LEGACY_CLASH_PREFIX = '_'
+SHOP_CART_HEADER = ('Ingredient', 'Total Amount', 'Measurement Unit')
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
 def get_ingridients_in_shop_cart(user):
-    ingredient_details = (
-        IngredientRecipe.objects.filter(recipe__usershoppingcart__user=user)
-        .values('ingredients__name', 'ingredients__measurement_unit')
-        .annotate(
-            amount=Sum(F('amount')),
+    return list(
+        ShoppingListItem.objects.filter(user=user)
+        .values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
         )
-        .order_by('ingredients__name')
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
     )
 
-    return {
-        item['ingredients__name']: {
-            'amount': item['amount'],
-            'unit': item['ingredients__measurement_unit']
-        }
-        for item in ingredient_details
-    }
+
+def shop_cart_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOP_CART_HEADER)
+    for name, unit, amount in rows:
+        yield writer.writerow((name, amount, unit))
+
+
+def shop_cart_txt(rows):
+    for name, unit, amount in rows:
+        yield f'{name} ({unit}) — {amount}\n'
+
+
+def shop_cart_json(rows):
+    separator = '['
+    for name, unit, amount in rows:
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+def encode_base62(number):
+    code = ''
+    while True:
+        number, remainder = divmod(number, len(BASE62_ALPHABET))
+        code = BASE62_ALPHABET[remainder] + code
+        if not number:
+            return code
+
+
+def recipe_path(pk):
+    return f'/recipes/{pk}'
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+short_links = LRUCache(settings.SHORT_LINK_CACHE_SIZE)
+
+
+def get_or_create_short_link(pk):
+    long_link = recipe_path(pk)
+    codes = (encode_base62(pk), LEGACY_CLASH_PREFIX + encode_base62(pk))
+    for code in codes:
+        if short_links.get(code) == long_link:
+            return code
+    if not Recipe.objects.filter(pk=pk).exists():
+        return None
+    for code in codes:
+        link, created = Link.objects.get_or_create(
+            short_link=code, defaults={'long_link': long_link}
+        )
+        short_links.set(code, link.long_link)
+        if link.long_link == long_link:
+            return code
+
+
+def resolve_short_link(code):
+    long_link = short_links.get(code)
+    if long_link is None:
+        long_link = Link.objects.filter(
+            short_link=code
+        ).values_list('long_link', flat=True).first()
+        if long_link is not None:
+            short_links.set(code, long_link)
+    return long_link
@@ -1,23 +1,44 @@
-import csv
-import uuid
-
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from recipes import cache, metrics
 from recipes.filters import IngredientSearchFilter, RecipeFilter
-from recipes.models import (Ingredient, Link, Recipe, Tag, UserFavourite,
-                            UserShoppingCart)
+from recipes.catalog import get_catalog
+from recipes.conditional import (conditional_response, make_etag,
+                                 user_state_version)
+from recipes.models import (Ingredient, Recipe, RecipeRanking,
+                            ShoppingListItem, SimilarRecipe, Tag,
+                            UserFavourite, UserShoppingCart)
+from recipes.pagination import (FeedPagination, RecipeCursorPagination,
+                                RecipePagination)
 from recipes.permissions import IsOwner
+from recipes.rankings import WINDOW_ALL, refreshed_at, windows
+from recipes.renderers import ShopCartCSVRenderer, ShopCartTextRenderer
 from recipes.serializers import (IngredientSerializer, RecipeCreateSerializer,
-                                 RecipeSerializer, TagSerializer,
+                                 RecipeIdsSerializer, RecipeSerializer,
+                                 ShoppingListItemSerializer,
+                                 SimilarRecipeSerializer, TagSerializer,
                                  UserFavouriteSerializer,
                                  UserShoppingCartSerializer)
-from recipes.utils import get_ingridients_in_shop_cart
+from recipes.utils import (get_ingridients_in_shop_cart,
+                           get_or_create_short_link, resolve_short_link,
+                           shop_cart_csv, shop_cart_json, shop_cart_txt)
+
+
+CURSOR_INCOMPATIBLE_PARAMS = ('have', 'search', 'ordering')
+SHOP_CART_WRITERS = {
+    'csv': shop_cart_csv,
+    'txt': shop_cart_txt,
+    'json': shop_cart_json,
+}
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -27,18 +48,151 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipeFilter
 
     def get_queryset(self):
-        queryset = Recipe.objects.all()
+        queryset = Recipe.objects.with_relations().with_user_flags(
+            self.request.user
+        )
         is_favorited = self.request.GET.get('is_favorited')
         is_in_shopping_cart = self.request.GET.get('is_in_shopping_cart')
         if self.request.user.is_authenticated and is_favorited:
-            queryset = queryset.filter(
-                userfavorites__user=self.request.user
-            )
+            queryset = queryset.filter(is_favorited=True)
         if self.request.user.is_authenticated and is_in_shopping_cart:
-            queryset = queryset.filter(
-                usershoppingcart__user=self.request.user
+            queryset = queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    @property
+    def paginator(self):
+        if (not hasattr(self, '_paginator')
+                and RecipeCursorPagination.cursor_query_param
+                in self.request.query_params):
+            self._paginator = RecipeCursorPagination()
+        return super().paginator
+
+    def recipe_etag(self, *parts):
+        user = self.request.user
+        return make_etag(
+            self.request.get_full_path(),
+            user.pk,
+            user_state_version(user),
+            get_catalog().etag,
+            *parts
+        )
+
+    def recipe_last_modified(self, updated_at):
+        if self.request.user.is_authenticated:
+            return None
+        return updated_at
+
+    def paginate_queryset(self, queryset):
+        ranking = getattr(self.request, 'pantry_ranking', None)
+        if ranking is None:
+            return super().paginate_queryset(queryset)
+        found = set(queryset.order_by().values_list('id', flat=True))
+        recipe_ids = [pk for pk in ranking if pk in found]
+        recipe_ids = super().paginate_queryset(recipe_ids) or recipe_ids
+        recipes = queryset.in_bulk(recipe_ids)
+        return [recipes[pk] for pk in recipe_ids if pk in recipes]
+
+    def list(self, request, *args, **kwargs):
+        if (RecipeCursorPagination.cursor_query_param in request.query_params
+                and any(param in request.query_params
+                        for param in CURSOR_INCOMPATIBLE_PARAMS)):
+            raise ValidationError({
+                RecipeCursorPagination.cursor_query_param: [
+                    'Курсорная пагинация несовместима с параметрами '
+                    f'{", ".join(CURSOR_INCOMPATIBLE_PARAMS)}.'
+                ]
+            })
+        stamps = []
+        if request.query_params.get('ordering') == 'popular':
+            stamps.append(refreshed_at(WINDOW_ALL))
+        return conditional_response(
+            request,
+            lambda: self.cached_list(request, stamps, *args, **kwargs),
+            self.recipe_etag(cache.list_version(), *stamps)
+        )
+
+    def cached_list(self, request, stamps, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return cache.cached_response(
+            cache.list_cache_key(request, *stamps),
+            lambda: viewsets.ModelViewSet.list(
+                self, request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        updated_at = pk.isdigit() and Recipe.objects.filter(
+            pk=pk
+        ).values_list('updated_at', flat=True).first()
+        if not updated_at:
+            return super().retrieve(request, *args, **kwargs)
+        return conditional_response(
+            request,
+            lambda: self.cached_retrieve(request, *args, **kwargs),
+            self.recipe_etag(updated_at),
+            self.recipe_last_modified(updated_at)
+        )
+
+    def cached_retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        pk = int(kwargs[self.lookup_field])
+        return cache.cached_response(
+            cache.detail_cache_key(request, pk),
+            lambda: viewsets.ModelViewSet.retrieve(
+                self, request, *args, **kwargs
+            ),
+            pk=pk
+        )
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(self.get_queryset(), request, self)
+        serializer = RecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        window = request.query_params.get(
+            'window', settings.TRENDING_DEFAULT_WINDOW
+        )
+        if window not in windows():
+            raise ValidationError(
+                {'window': [f'Допустимые окна: {", ".join(windows())}.']}
             )
-        return queryset.distinct()
+        paginator = RecipePagination()
+        recipe_ids = paginator.paginate_queryset(
+            RecipeRanking.objects.filter(window=window).order_by(
+                'position'
+            ).values_list('recipe_id', flat=True),
+            request,
+            self
+        )
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = RecipeSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='cache-stats',
+        permission_classes=[IsAdminUser]
+    )
+    def cache_stats(self, request):
+        return Response(cache.get_stats())
 
     def get_serializer_class(self):
         if self.action == 'create' or self.action == 'partial_update':
@@ -54,41 +208,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated])
     def favorite(self, request, pk=None):
         if request.method == 'POST':
-            return self.add_to_favorites(request, pk)
-        return self.remove_from_favorites(request, pk)
-
-    def add_to_favorites(self, request, pk=None):
-        if not Recipe.objects.filter(pk=pk).exists():
-            return Response(
-                {'error': 'Такого рецепта не существует.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        recipe = self.get_object()
-        user = request.user
-        if not user.is_authenticated:
-            return Response(status=status.HTTP_401_UNAUTHORIZED)
-
-        userfavourite, created = UserFavourite.objects.get_or_create(
-            user=user, recipe=recipe
-        )
-        if created:
-            serializer = UserFavouriteSerializer(userfavourite)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
-
-    def remove_from_favorites(self, request, pk=None):
-        recipe = self.get_object()
-        user = request.user
-        if not user.is_authenticated:
-            return Response(status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            user_fav_recipe = UserFavourite.objects.get(
-                user=user, recipe=recipe
-            )
-        except UserFavourite.DoesNotExist:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        user_fav_recipe.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+            return self.add_recipe(UserFavourite, UserFavouriteSerializer, pk)
+        return self.remove_recipe(UserFavourite, pk)
 
     @action(
         detail=True,
@@ -97,96 +218,164 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk=None):
         if request.method == 'POST':
-            return self.add_to_shopping_cart(request, pk)
-        else:
-            return self.remove_from_shopping_cart(request, pk)
+            return self.add_recipe(
+                UserShoppingCart, UserShoppingCartSerializer, pk
+            )
+        return self.remove_recipe(UserShoppingCart, pk)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorite_bulk(self, request):
+        return self.change_recipes(UserFavourite)
 
-    def add_to_shopping_cart(self, request, pk=None):
-        if not Recipe.objects.filter(pk=pk).exists():
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_bulk(self, request):
+        return self.change_recipes(UserShoppingCart)
+
+    def missing_recipe_response(self, pk):
+        if pk.isdigit() and Recipe.objects.filter(pk=pk).exists():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'error': 'Такого рецепта не существует.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    def add_recipe(self, model, serializer_class, pk):
+        added = pk.isdigit() and model.objects.add(
+            self.request.user, [int(pk)]
+        )
+        if not added:
+            return self.missing_recipe_response(pk)
+        return Response(
+            serializer_class(added[0]).data, status=status.HTTP_201_CREATED
+        )
+
+    def remove_recipe(self, model, pk):
+        if pk.isdigit() and model.objects.remove(
+            self.request.user, [int(pk)]
+        ):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.missing_recipe_response(pk)
+
+    def change_recipes(self, model):
+        serializer = RecipeIdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if self.request.method == 'POST':
+            added = model.objects.add(self.request.user, recipe_ids)
             return Response(
-                {'error': 'Такого рецепта не существует.'},
-                status=status.HTTP_404_NOT_FOUND
+                {'added': [item.recipe_id for item in added]},
+                status=status.HTTP_201_CREATED
             )
-        recipe = self.get_object()
-        user = request.user
-        if not user.is_authenticated:
-            return Response(status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            UserShoppingCart.objects.get(user=user, recipe=recipe)
-        except UserShoppingCart.DoesNotExist:
-            usershoppingcart = UserShoppingCart.objects.create(
-                user=user, recipe=recipe
-            )
-            serializer = UserShoppingCartSerializer(
-                usershoppingcart,
-                data=request.data,
-                partial=True
-            )
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
-
-    def remove_from_shopping_cart(self, request, pk=None):
-        recipe = self.get_object()
-        user = request.user
-        if not user.is_authenticated:
-            return Response(status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            recipe_in_shopping_card = UserShoppingCart.objects.get(
-                user=user, recipe=recipe
-            )
-        except UserShoppingCart.DoesNotExist:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        recipe_in_shopping_card.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(
+            {'removed': sorted(model.objects.remove(
+                self.request.user, recipe_ids
+            ))}
+        )
 
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            ShopCartCSVRenderer, ShopCartTextRenderer, JSONRenderer
+        ]
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        response = HttpResponse(content_type='text/csv', charset='utf-8')
+        export_format = request.accepted_renderer.format
+        writer = SHOP_CART_WRITERS[export_format]
+        response = StreamingHttpResponse(
+            writer(get_ingridients_in_shop_cart(request.user)),
+            content_type=f'{request.accepted_renderer.media_type}; '
+                         'charset=utf-8'
+        )
         response['Content-Disposition'] = (
-            'attachment; filename="ingredients_to_buy.csv"'
-        )
-        writer = csv.writer(response)
-        writer.writerow(['Ingredient', 'Total Amount', 'Measurement Unit'])
-        for ingredient_name, details in get_ingridients_in_shop_cart(
-            user
-        ).items():
-            writer.writerow(
-                [ingredient_name, details['amount'], details['unit']]
-            )
+            f'attachment; filename="ingredients_to_buy.{export_format}"'
+        )
         return response
 
-    @action(detail=True, methods=['get'], url_path='get-link')
-    def get_link(self, request, pk=None):
-        base_link = request.build_absolute_uri('/')
-        long_link = f"{base_link}recipes/{pk}"
-        try:
-            link = Link.objects.get(long_link=long_link)
-        except Link.DoesNotExist:
-            short_link = generate_short_link(base_link)
-            link = Link.objects.create(
-                long_link=long_link,
-                short_link=short_link
-            )
-        return Response({'short-link': link.short_link})
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='shopping_cart/summary',
+        url_name='shopping-cart-summary',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_summary(self, request):
+        items = ShoppingListItem.objects.filter(
+            user=request.user
+        ).select_related('ingredient').order_by(
+            'ingredient__name', 'ingredient__measurement_unit'
+        )
+        return Response({
+            'recipes': UserShoppingCart.objects.filter(
+                user=request.user
+            ).count(),
+            'ingredients': ShoppingListItemSerializer(items, many=True).data,
+        })
 
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        limit = request.query_params.get('limit', '')
+        limit = min(
+            int(limit) if limit.isdigit() and int(limit) else
+            settings.SIMILAR_RECIPES_COUNT,
+            settings.SIMILAR_RECIPES_COUNT
+        )
+        similar = list(SimilarRecipe.objects.filter(
+            recipe_id=pk
+        ).select_related('similar').order_by('-score', 'similar_id')[:limit])
+        if not similar and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response(SimilarRecipeSerializer(
+            similar, many=True, context={'request': request}
+        ).data)
 
-def generate_short_link(base_link):
-    unique_id = uuid.uuid4().hex[:5]
-    short_link = f"{base_link}s/{unique_id}/"
-    return short_link
+    @action(detail=True, methods=['get'], url_path='get-link')
+    def get_link(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        code = get_or_create_short_link(int(pk))
+        if code is None:
+            raise Http404
+        return Response(
+            {'short-link': request.build_absolute_uri(f'/s/{code}/')}
+        )
 
 
 @api_view(['GET'])
 def redirect_from_short_link(request, slug=None):
-    link = get_object_or_404(Link, short_link=request.build_absolute_uri())
-    return redirect(link.long_link)
+    long_link = resolve_short_link(slug)
+    if long_link is None:
+        raise Http404
+    return redirect(long_link)
+
+
+def export_metrics(request):
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def catalog_response(lookup, pk):
+    item = lookup(int(pk)) if pk.isdigit() else None
+    if item is None:
+        raise Http404
+    return Response(item)
 
 
 class IngredientViewSet(viewsets.ModelViewSet):
@@ -197,9 +386,43 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientSearchFilter
 
+    def list(self, request, *args, **kwargs):
+        catalog = get_catalog()
+        return conditional_response(
+            request,
+            lambda: Response(catalog.ingredient_index.search(
+                request.query_params.get('name', '')
+            )),
+            make_etag(catalog.etag, request.get_full_path())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        catalog = get_catalog()
+        return conditional_response(
+            request,
+            lambda: catalog_response(catalog.ingredient, kwargs['pk']),
+            make_etag(catalog.etag, request.get_full_path())
+        )
+
 
 class TagViewSet(viewsets.ModelViewSet):
     http_method_names = ['get']
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        catalog = get_catalog()
+        return conditional_response(
+            request,
+            lambda: Response(catalog.tag_list),
+            make_etag(catalog.etag, request.get_full_path())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        catalog = get_catalog()
+        return conditional_response(
+            request,
+            lambda: catalog_response(catalog.tag, kwargs['pk']),
+            make_etag(catalog.etag, request.get_full_path())
+        )
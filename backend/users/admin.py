@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from recipes.models import User
+from users.authentication import invalidate_user_tokens
 from users.models import Subscription
 
 
@@ -9,6 +10,8 @@ class UserAdmin(admin.ModelAdmin):
                     'username',
                     'first_name',
                     'last_name',
+                    'recipes_count',
+                    'subscribers_count',
                     )
     list_filter = ('is_blocked',)
     search_fields = ('email',
@@ -16,9 +19,11 @@ class UserAdmin(admin.ModelAdmin):
 
     def block_users(self, request, queryset):
         queryset.update(is_blocked=True)
+        invalidate_user_tokens(*queryset.values_list('pk', flat=True))
 
     def unblock_users(self, request, queryset):
         queryset.update(is_blocked=False)
+        invalidate_user_tokens(*queryset.values_list('pk', flat=True))
 
 
 admin.site.register(User, UserAdmin)
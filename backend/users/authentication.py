@@ -0,0 +1,62 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.models import User
+
+
+def token_cache_key(key):
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_tokens(*keys):
+    cache_keys = [token_cache_key(key) for key in keys]
+    if cache_keys:
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def invalidate_user_tokens(*user_ids):
+    invalidate_tokens(*Token.objects.filter(
+        user_id__in=user_ids
+    ).values_list('key', flat=True))
+
+
+class CachedUser(SimpleLazyObject):
+
+    def __init__(self, user_id):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__.update(
+            pk=user_id,
+            id=user_id,
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False
+        )
+
+    def __bool__(self):
+        return True
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key, (user.pk, user.is_active),
+                settings.TOKEN_CACHE_TIMEOUT
+            )
+            return user, token
+        user_id, is_active = cached
+        if not is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return CachedUser(user_id), Token(key=key, user_id=user_id)
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:42
+
+from django.db import migrations, models
+from django.db.models import Q
+
+PULL_RECIPES_COUNT = 500
+PULL_SUBSCRIBERS_COUNT = 10000
+
+
+def mark_pulled_authors(apps, schema_editor):
+    apps.get_model('users', 'User').objects.filter(
+        Q(recipes_count__gte=PULL_RECIPES_COUNT)
+        | Q(subscribers_count__gte=PULL_SUBSCRIBERS_COUNT)
+    ).update(feed_pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_pulled',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Лента собирается при чтении'),
+        ),
+        migrations.RunPython(mark_pulled_authors, migrations.RunPython.noop),
+    ]
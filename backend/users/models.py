@@ -6,6 +6,8 @@ from users.constants import (MAX_LENGTH_EMAIL, MAX_LENGTH_FIRST_NAME,
                              MAX_LENGTH_USERNAME)
 from users.validators import username_validator
 
+DENORMALIZED_FIELDS = ('recipes_count', 'subscribers_count', 'feed_pulled')
+
 
 class User(AbstractUser):
     email = models.EmailField(max_length=MAX_LENGTH_EMAIL,
@@ -26,6 +28,21 @@ class User(AbstractUser):
                                default=None,
                                null=True)
     is_blocked = models.BooleanField(default=False)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False
+    )
+    feed_pulled = models.BooleanField(
+        verbose_name='Лента собирается при чтении',
+        default=False,
+        editable=False
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
 
@@ -36,6 +53,36 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def field_value(self, name):
+        field = self._meta.get_field(name)
+        return field.get_prep_value(field.value_from_object(self))
+
+    def changed_fields(self, names):
+        loaded = getattr(self, '_loaded_values', {})
+        return {
+            name for name in names
+            if name not in loaded or loaded[name] != self.field_value(name)
+        }
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: self.field_value(field.name)
+            for field in self._meta.concrete_fields
+        }
+
 
 class Subscription(models.Model):
     subscriber = models.ForeignKey(
@@ -4,6 +4,7 @@ from rest_framework import serializers
 
 from drf_extra_fields.fields import Base64ImageField
 from recipes.models import User
+from recipes.utils import ThumbnailField
 from users.models import Subscription
 
 
@@ -23,9 +24,12 @@ class AvatarSerializer(serializers.ModelSerializer):
 
 class UserSerializer(UserSerializer):
     avatar = Base64ImageField(required=False)
+    avatar_thumbnail = ThumbnailField(source='avatar')
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         if 'request' in self.context and self.context[
             'request'
         ].user.is_authenticated:
@@ -40,7 +44,7 @@ class UserSerializer(UserSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'username', 'first_name',
-                  'last_name', 'avatar', 'is_subscribed')
+                  'last_name', 'avatar', 'avatar_thumbnail', 'is_subscribed')
 
 
 class UserCreateSerializer(UserCreateSerializer):
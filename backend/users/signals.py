@@ -0,0 +1,42 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import invalidate_tokens, invalidate_user_tokens
+from users.models import Subscription, User
+
+AUTH_FIELDS = frozenset(('is_active', 'password'))
+
+
+@receiver(post_save, sender=Subscription)
+def increment_subscribers_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.subscription_id).update(
+            subscribers_count=F('subscribers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_subscribers_count(sender, instance, **kwargs):
+    User.objects.filter(
+        pk=instance.subscription_id, subscribers_count__gt=0
+    ).update(
+        subscribers_count=F('subscribers_count') - 1
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, update_fields=None,
+                           **kwargs):
+    if created:
+        return
+    if instance.changed_fields(
+        AUTH_FIELDS & set(update_fields or AUTH_FIELDS)
+    ):
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_tokens(instance.key)
@@ -1,5 +1,7 @@
+from collections import defaultdict
 from http import HTTPStatus
 
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
@@ -11,7 +13,7 @@ from rest_framework.response import Response
 
 from recipes.permissions import IsOwner
 from recipes.serializers import SubscriptionSerializer
-from recipes.models import User
+from recipes.models import Recipe, User
 from users.constants import SUBSCRIPTIONS_PAGE_NUMBER
 from users.models import Subscription
 from users.serializers import AvatarSerializer
@@ -35,14 +37,29 @@ class UserViewSet(UserViewSet):
         permission_classes=[IsOwner]
     )
     def subscriptions(self, request):
-        subscriptions = Subscription.objects.filter(subscriber=request.user)
+        subscriptions = Subscription.objects.filter(
+            subscriber=request.user
+        ).select_related('subscription').order_by('id')
         paginator = LimitOffsetPagination()
         paginator.default_limit = SUBSCRIPTIONS_PAGE_NUMBER
         paginated_subscriptions = paginator.paginate_queryset(
             subscriptions, request
         )
+        recipes_limit = int(request.GET.get('recipes_limit', 3))
+        recipes_by_author = defaultdict(list)
+        for recipe in Recipe.objects.latest_by_author(
+            [subscription.subscription_id
+             for subscription in paginated_subscriptions],
+            recipes_limit
+        ).only('id', 'name', 'image', 'cooking_time', 'author_id'):
+            recipes_by_author[recipe.author_id].append(recipe)
         serializer = SubscriptionSerializer(
-            paginated_subscriptions, many=True, context={'request': request}
+            paginated_subscriptions,
+            many=True,
+            context={
+                'request': request,
+                'recipes_by_author': recipes_by_author
+            }
         )
         return paginator.get_paginated_response(serializer.data)
 
@@ -82,9 +99,10 @@ def subscribe(request, pk):
             subscriber=request.user, subscription=user
         ).exists()
         if not subscription_exists:
-            subscription = Subscription.objects.create(
-                subscriber=request.user, subscription=user
-            )
+            with transaction.atomic():
+                subscription = Subscription.objects.create(
+                    subscriber=request.user, subscription=user
+                )
             serializer = SubscriptionSerializer(
                 subscription,
                 context={'request': request}